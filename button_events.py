@@ -0,0 +1,64 @@
+from array import array
+
+try:
+    from machine import Pin
+except ImportError:
+    Pin = None  # No pin interrupts, e.g. on a PC; callers fall back to polling
+
+from frame_ticker import ticks_diff, ticks_ms
+
+DEBOUNCE_MS = 30  # Edges this soon after the last one, pressing or releasing, are switch bounce
+QUEUE_SIZE = 8  # Presses waiting to be handled; more are dropped
+
+
+class ButtonEvents:
+    """Queues debounced presses from pin interrupts.
+
+    Presses are caught even while the main loop is stuck in blocking work, and are
+    handled in order the next time it gets round to pop().
+    """
+
+    def __init__(self, pins, debounce_ms=DEBOUNCE_MS):
+        self.debounce_ms = debounce_ms
+        self.queue = array("B", bytes(QUEUE_SIZE))
+        self.head = 0  # Next event to pop
+        self.tail = 0  # Next free slot
+        self.numbers = list(pins)
+        self.pins = []
+        self.last = [0] * len(self.numbers)  # When each pin last changed, either way
+        self.enabled = False
+        if Pin is None:
+            return
+        try:
+            for number in self.numbers:
+                # The switches pull the pin low when pressed; releases are watched
+                # too, so their bounce isn't taken for another press
+                pin = Pin(number, Pin.IN, Pin.PULL_UP)
+                pin.irq(self._changed, Pin.IRQ_FALLING | Pin.IRQ_RISING)
+                self.pins.append(pin)
+            self.enabled = True
+        except (AttributeError, OSError, ValueError) as e:
+            print(f"Button interrupts unavailable, polling instead: {e}")
+
+    def _changed(self, pin):
+        # Runs in interrupt context: no allocation, just record the press
+        now = ticks_ms()
+        for i in range(len(self.pins)):
+            if self.pins[i] is pin:
+                bounce = ticks_diff(now, self.last[i]) < self.debounce_ms
+                self.last[i] = now
+                if bounce or pin.value():
+                    return  # Bounce, or a release
+                tail = (self.tail + 1) % QUEUE_SIZE
+                if tail != self.head:
+                    self.queue[self.tail] = self.numbers[i]
+                    self.tail = tail
+                return
+
+    def pop(self):
+        """Return the pin number of the oldest unhandled press, or None."""
+        if self.head == self.tail:
+            return None
+        number = self.queue[self.head]
+        self.head = (self.head + 1) % QUEUE_SIZE
+        return number
@@ -0,0 +1,55 @@
+"""The digest format served by the companion aggregator (host/aggregator.py).
+
+A digest is UTF-8 text, one line per record, so the device can store it as it streams:
+
+    RSD2<TAB>version<TAB>count
+    key<TAB>date<TAB>title<TAB>description     (count lines)
+
+Titles and descriptions are already cleaned, so they hold no tabs or newlines. The key
+is the seen_index.item_key of the raw title and link, and the date is the feed's own
+pubDate or updated text, empty if it has none, for the device to parse.
+"""
+
+DIGEST_MAGIC = "RSD2"
+DIGEST_MAX_LINE = 2048  # Bytes; the aggregator shortens descriptions to fit
+
+
+def format_header(version, count):
+    return f"{DIGEST_MAGIC}\t{version}\t{count}\n"
+
+
+def format_item(key, title, description, date=""):
+    return f"{key}\t{date}\t{title}\t{description}\n"
+
+
+def parse_header(line):
+    """Return the version from a header line, or raise ValueError."""
+    fields = line.split("\t")
+    if len(fields) != 3 or fields[0] != DIGEST_MAGIC:
+        raise ValueError("Not a feed digest")
+    return fields[1]
+
+
+def parse_item(line):
+    """Return (key, title, description, date) from an item line."""
+    key, date, title, description = line.split("\t", 3)
+    return key, title, description, date
+
+
+def quote(text):
+    """Percent-encode a feed name for a query string, e.g. "The Verge" -> "The%20Verge"."""
+    out = ""
+    for byte in text.encode():
+        c = chr(byte)
+        if byte < 128 and (c.isalpha() or c.isdigit() or c in "-_.~"):
+            out += c
+        else:
+            out += "%{:02X}".format(byte)
+    return out
+
+
+def digest_url(base_url, feed, version=None):
+    url = f"{base_url.rstrip('/')}/feed?name={quote(feed)}"
+    if version:
+        url += f"&v={version}"
+    return url
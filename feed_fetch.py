@@ -0,0 +1,455 @@
+import gc
+import os
+
+import inflate
+import profiler
+from http_pool import BufferPool
+from inflate import Inflater
+from digest import DIGEST_MAX_LINE, digest_url, parse_header, parse_item
+from feed_parser import parse_date, parse_rss_data_from_file
+from seen_index import item_key
+from text_cleanup import cleanup_text
+
+# Streaming fetch settings
+FETCH_CHUNK_SIZE = 512  # Bytes read from the socket per step
+MAX_FEED_BYTES = 48 * 1024  # Stop downloading a feed after this many bytes
+MAX_FEED_ITEMS = 15  # Stop downloading once this many complete items are saved
+ITEM_END_TAGS = (b"</item>", b"</entry>")
+ITEM_TAG_OVERLAP = len(b"</entry>") - 1
+# Concurrent downloads share these, so at most FETCH_BUFFERS chunks are in RAM at once
+FETCH_BUFFERS = 4
+read_buffers = BufferPool(FETCH_BUFFERS, FETCH_CHUNK_SIZE)
+FEED_RANGE = {"Range": f"bytes=0-{MAX_FEED_BYTES - 1}"}
+
+# Compressed downloads
+MAX_INFLATERS = 1  # Downloads asking for a compressed body at once; each needs a 32KB window
+# Free heap needed to ask for a compressed body: the window and a margin for the rest
+INFLATE_MIN_FREE = (1 << inflate.INFLATE_WBITS) + 16 * 1024
+ACCEPT_COMPRESSED = {"Accept-Encoding": "gzip, deflate"}
+inflate_buffer = bytearray(FETCH_CHUNK_SIZE)  # Decompressed bytes on their way to flash
+
+# Prefetch settings
+PREFETCH_MIN_FREE = 40 * 1024  # Pause prefetching while free heap is below this
+
+mem_free = getattr(gc, "mem_free", None)  # MicroPython only
+
+
+def new_inflater():
+    """An Inflater for a download about to ask for a compressed body, or None if none is free.
+
+    Without the heap for another window the plain body is asked for instead, rather
+    than failing part way through.
+    """
+    if not inflate.available or inflate.active >= MAX_INFLATERS:
+        return None
+    if mem_free is not None and mem_free() < INFLATE_MIN_FREE:
+        gc.collect()
+        if mem_free() < INFLATE_MIN_FREE:
+            return None
+    return Inflater()
+
+
+def content_encoding(response):
+    for name, value in getattr(response, "headers", {}).items():
+        if name.lower() == "content-encoding":
+            return value.strip().lower()
+    return "identity"
+
+
+class Download:
+    """A feed download to flash from a pooled response, saved one chunk at a time.
+
+    The caller reads the response and hands each chunk to save(). A gzip or deflate
+    body is inflated on the way, so the caps apply to the feed itself rather than
+    what was sent.
+    """
+
+    def __init__(self, response, filename="rss_data.xml", max_items=MAX_FEED_ITEMS, inflater=None):
+        self.filename = filename
+        self.max_items = max_items
+        self.written = 0
+        self.received = 0  # Bytes of body as sent, compressed or not
+        self.items = 0
+        self._tail = b""  # End of the previous chunk, so closing tags split across reads are found
+        self._file = None
+        self._inflater = None
+        self._response = response
+        try:
+            self._inflater = self._decoder(inflater)
+        except BaseException:
+            if inflater:
+                inflater.close()
+            response.close()
+            raise
+        self._file = open(filename, "wb")
+
+    def _decoder(self, inflater):
+        """The Inflater for the response's body, or None if it isn't compressed."""
+        encoding = content_encoding(self._response)
+        if encoding in inflate.ENCODINGS:
+            return inflater or Inflater()  # Sent compressed even if not asked to
+        if inflater:
+            inflater.close()
+        if encoding != "identity":
+            raise OSError(f"Unsupported content encoding {encoding}")
+        return None
+
+    def save(self, buf, n):
+        """Save n bytes of body from buf, 0 at its end. Returns True once finished or capped."""
+        self.received += n
+        inflater = self._inflater
+        if inflater is None:
+            return not n or self._store(buf, n)
+        if n:
+            inflater.write(memoryview(buf)[:n])
+        else:
+            inflater.end()
+        while True:
+            m = inflater.readinto(inflate_buffer)
+            if not m:
+                return inflater.done
+            if self._store(inflate_buffer, m):
+                return True
+
+    def _store(self, buf, n):
+        """Write n bytes of feed from buf to flash. Returns True once a cap is reached."""
+        view = memoryview(buf)
+        n = min(n, MAX_FEED_BYTES - self.written)
+        keep = n
+
+        # Count complete items, remembering where the last wanted one ends
+        window = self._tail + bytes(view[:n])
+        for tag in ITEM_END_TAGS:
+            # Tags wholly inside the tail were counted with the previous chunk
+            pos = window.find(tag, max(0, len(self._tail) - len(tag) + 1))
+            while pos != -1 and self.items < self.max_items:
+                self.items += 1
+                if self.items == self.max_items:
+                    keep = pos + len(tag) - len(self._tail)
+                pos = window.find(tag, pos + len(tag))
+        self._tail = window[-ITEM_TAG_OVERLAP:]
+        window = None
+
+        if self.items < self.max_items and self.written + n >= MAX_FEED_BYTES:
+            # Byte cap reached: cut before the last tag so no UTF-8 sequence is split
+            cut = bytes(view[:n]).rfind(b"<")
+            if cut > 0:
+                keep = cut
+
+        self._file.write(view[:keep])
+        self.written += keep
+        return self.items >= self.max_items or keep < n or self.written >= MAX_FEED_BYTES
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._inflater:
+            self._inflater.close()
+        if self._response:
+            self._response.close()
+            self._response = None
+
+
+class Prefetch:
+    """Downloads a feed to flash, then parses and cleans it into the item store a step at a time.
+
+    Only the item being cleaned is held in memory; everything else is on flash.
+    Items already in seen are stored without their description, which is never cleaned.
+    Given a running ParseWorker, parsing and cleaning happen on the second core and
+    step() just stores the items it hands back.
+    """
+
+    def __init__(
+        self,
+        feed,
+        url,
+        store,
+        filename="rss_data.xml",
+        seen=None,
+        max_items=MAX_FEED_ITEMS,
+        worker=None,
+    ):
+        self.feed = feed
+        self.url = url
+        self.store = store
+        self.seen = seen
+        self.filename = filename
+        self.max_items = max_items
+        self.count = 0
+        self.new = 0  # Items not in seen
+        self.done = False
+        self.downloading = False  # download() is scheduled or running; step() waits for it
+        self._download = None
+        self._items = None
+        self._writer = None
+        self._worker = worker
+        self._parsing = False  # The worker has the downloaded file
+        self.cancelled = False  # Tells the worker to stop early
+
+    async def download(self, pool, buffers=read_buffers):
+        """Download the feed over a pooled connection, leaving parsing and cleaning to step().
+
+        Several feeds can download at once like this. Each holds one of the shared
+        buffers only while it reads a chunk.
+        """
+        self.downloading = True
+        feed = self.feed
+        started = profiler.start()
+        try:
+            print(f"Prefetching RSS data from: {self.url}")
+            # Servers that honour the range send no more than will be kept
+            inflater = new_inflater()
+            headers = FEED_RANGE
+            if inflater:
+                headers = dict(FEED_RANGE)
+                headers.update(ACCEPT_COMPRESSED)
+            try:
+                response = await pool.get(self.url, headers)
+                if response.status_code not in (200, 206):
+                    response.close()
+                    raise OSError(f"HTTP {response.status_code}")
+            except BaseException:
+                if inflater:
+                    inflater.close()
+                raise
+            self._download = Download(response, self.filename, self.max_items, inflater)
+            profiler.stop(feed, "connect", started)
+            while not self.done:
+                buf = await buffers.acquire()
+                try:
+                    started = profiler.start()
+                    n = await response.readinto(buf)
+                    finished = self._download.save(buf, n)
+                    if finished:
+                        await response.drain(buf)
+                    profiler.stop(feed, "download", started)
+                finally:
+                    buffers.release(buf)
+                if finished:
+                    self._downloaded()
+                    break
+        except Exception as e:
+            print(f"Error prefetching RSS data from {self.url}: {e}")
+            profiler.error(feed, e)
+            self.discard()
+        finally:
+            self.downloading = False
+
+    def step(self, blocking=False):
+        """Do one small piece of work once download() is done: parse and clean one item."""
+        if self.done or self.downloading:
+            return
+        if self._parsing:
+            self._worker.collect()
+            return
+        if self._items is None or (not blocking and gc.mem_free() < PREFETCH_MIN_FREE):
+            return
+        feed = self.feed
+        started = profiler.start()
+        try:
+            item = next(self._items, None)
+            profiler.stop(feed, "parse", started)
+            if item is None:
+                print(f"Stored {self.count} items for {self.feed}")
+                self._writer.commit()
+                self._writer = None
+                self._finish()
+                return
+            title, description, link, date = item
+            key = item_key(title, link)
+            started = profiler.start()
+            title = cleanup_text(title)
+            if self.seen is not None and key in self.seen:
+                description = ""  # Shown before, so only the title is needed
+            else:
+                description = cleanup_text(description)
+                self.new += 1
+            profiler.stop(feed, "clean", started)
+            started = profiler.start()
+            self._writer.append(title, description, str(key), str(parse_date(date)))
+            profiler.stop(feed, "store", started)
+            profiler.add(feed, "items")
+            self.count += 1
+        except Exception as e:
+            print(f"Error prefetching RSS data from {self.url}: {e}")
+            profiler.error(feed, e)
+            self.discard()
+
+    def _downloaded(self):
+        print(
+            f"Prefetched {self._download.written} bytes to {self.filename} "
+            f"({self._download.received} received)"
+        )
+        profiler.add(self.feed, "bytes", self._download.written)
+        self._download.close()
+        self._writer = self.store.writer(self.feed)
+        if self._worker and self._worker.submit(self):
+            self._parsing = True
+        else:
+            self._items = parse_rss_data_from_file(self.filename)
+
+    def _take(self, record, new):
+        """Store an item cleaned by the worker."""
+        if self.done:
+            return  # Discarded while the worker had it
+        started = profiler.start()
+        try:
+            self._writer.append(*record)
+        except Exception as e:
+            print(f"Error storing RSS data from {self.url}: {e}")
+            profiler.error(self.feed, e)
+            self.discard()
+            return
+        profiler.stop(self.feed, "store", started)
+        profiler.add(self.feed, "items")
+        self.count += 1
+        self.new += new
+
+    def _parsed(self, stats):
+        """The worker has finished with the file: stats is (parse us, clean us, items, error)."""
+        self._parsing = False
+        parse_us, clean_us, count, error = stats
+        profiler.charge(self.feed, "parse", parse_us, count + 1)
+        if count:
+            profiler.charge(self.feed, "clean", clean_us, count)
+        if self.done:
+            self._finish()  # Now the file can go
+        elif error is not None:
+            print(f"Error prefetching RSS data from {self.url}: {error}")
+            profiler.error(self.feed, error)
+            self.discard()
+        else:
+            print(f"Stored {self.count} items for {self.feed}")
+            self._writer.commit()
+            self._writer = None
+            self._finish()
+
+    def _finish(self):
+        self.done = True
+        if self._items:
+            self._items.close()
+            self._items = None
+        if self._download and not self._parsing:
+            self._download.close()
+            try:
+                os.remove(self.filename)  # Free the flash for the next download
+            except OSError:
+                pass
+
+    def discard(self):
+        """Drop everything, e.g. when the fetch fails part way."""
+        self.cancelled = True
+        self._finish()
+        if self._writer:
+            self._writer.abort()
+            self._writer = None
+
+
+class DigestFetch:
+    """Fetches a feed pre-cleaned by the companion aggregator into the item store.
+
+    A drop-in for Prefetch when the aggregator is used. The digest is already in
+    display form, so each chunk's complete lines are stored as soon as it arrives.
+    """
+
+    def __init__(self, feed, base_url, store, seen=None):
+        self.feed = feed
+        # The version only helps while its items are cached; otherwise a 304 leaves nothing
+        self.url = digest_url(base_url, feed, store.versions.get(feed) if store.has(feed) else None)
+        self.store = store
+        self.seen = seen
+        self.count = 0
+        self.new = 0  # Items not in seen
+        self.done = False
+        self.downloading = False
+        self.version = None
+        self._response = None
+        self._writer = None
+        self._partial = b""  # A line split across chunks
+
+    async def download(self, pool, buffers=read_buffers):
+        """Fetch and store the digest over a pooled connection."""
+        self.downloading = True
+        started = profiler.start()
+        try:
+            print(f"Fetching digest: {self.url}")
+            self._response = await pool.get(self.url)
+            profiler.stop(self.feed, "connect", started)
+            self._opened()
+            while not self.done:
+                buf = await buffers.acquire()
+                try:
+                    started = profiler.start()
+                    self._save(buf, await self._response.readinto(buf))
+                    profiler.stop(self.feed, "download", started)
+                finally:
+                    buffers.release(buf)
+        except Exception as e:
+            print(f"Error fetching digest for {self.feed}: {e}")
+            profiler.error(self.feed, e)
+            self.discard()
+        finally:
+            self.downloading = False
+
+    def step(self, blocking=False):
+        """Nothing to do: download() stores each chunk as it arrives."""
+
+    def _opened(self):
+        status = self._response.status_code
+        if status == 304:
+            print(f"{self.feed} is unchanged")
+            self.store.touch(self.feed)
+            self.count = self.store.count(self.feed)
+            self._finish()
+            return
+        if status != 200:
+            raise OSError(f"HTTP {status}")
+        self._writer = self.store.writer(self.feed)
+
+    def _save(self, buf, n):
+        """Store the complete lines of n bytes of buf, or finish when n is 0."""
+        if not n:
+            if self.version is None:
+                raise ValueError("Empty digest")
+            print(f"Stored {self.count} items for {self.feed}")
+            self._writer.commit()
+            self._writer = None
+            if self.count:
+                self.store.versions[self.feed] = self.version
+            self._finish()
+            return
+        profiler.add(self.feed, "bytes", n)
+        lines = (self._partial + bytes(memoryview(buf)[:n])).split(b"\n")
+        self._partial = lines.pop()
+        # DIGEST_MAX_LINE counts the newline, so a line that long without it is too long
+        if len(self._partial) >= DIGEST_MAX_LINE:
+            raise ValueError("Digest line too long")
+        for line in lines:
+            if len(line) >= DIGEST_MAX_LINE:
+                raise ValueError("Digest line too long")
+            self._store_line(line.decode())
+
+    def _store_line(self, line):
+        if self.version is None:
+            self.version = parse_header(line)
+            return
+        key, title, description, date = parse_item(line)
+        if self.seen is None or int(key) not in self.seen:
+            self.new += 1
+        self._writer.append(title, description, key, str(parse_date(date)))
+        profiler.add(self.feed, "items")
+        self.count += 1
+
+    def _finish(self):
+        self.done = True
+        if self._response:
+            self._response.close()
+            self._response = None
+
+    def discard(self):
+        """Drop everything, e.g. when the fetch fails part way."""
+        self._finish()
+        if self._writer:
+            self._writer.abort()
+            self._writer = None
@@ -0,0 +1,318 @@
+PARSE_BUFFER_SIZE = 4 * 1024  # Bytes of the feed held at once; a longer field is cut to fit
+FIND_SLICE = 256  # Bytes copied at a time to search where bytearray has no find()
+
+
+def field_tags(*names):
+    """Return the opening and closing tags of the named fields."""
+    return [b"<" + name for name in names], [b"</" + name + b">" for name in names]
+
+
+# Item tags and the fields wanted from each item for each feed format: title,
+# description, publish date, then the tags that identify an item, most stable first
+RSS_TAGS = (b"<item>", b"</item>", field_tags(b"title", b"description", b"pubDate", b"guid", b"link"))
+ATOM_TAGS = (b"<entry>", b"</entry>", field_tags(b"title", b"content", b"updated", b"id"))
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+ZONES = {"EST": -5, "EDT": -4, "CST": -6, "CDT": -5, "MST": -7, "MDT": -6, "PST": -8, "PDT": -7}
+
+WHITESPACE = b" \t\r\n"
+FORMAT_OVERLAP = len(b"<entry>") - 1  # Kept while looking for the first item
+
+
+def parse_rss_data_from_file(filename="rss_data.xml", buffer=None):
+    """Yield (title, description, link, date) for each complete item, reading the file into one buffer."""
+    try:
+        with open(filename, "rb") as f:
+            yield from parse_rss_data(f, buffer)
+    except Exception as e:
+        print(f"Error parsing RSS data from file: {e}")
+
+
+def parse_rss_data(f, buffer=None):
+    """Yield (title, description, link, date) for each complete item read from f with readinto().
+
+    The feed is read into a bytearray of PARSE_BUFFER_SIZE (or the one given) and
+    searched in place. Only the wanted fields are decoded, so memory stays bounded
+    by the buffer whatever the size of the feed. Items longer than the buffer are
+    read field by field, and a field longer than the buffer is cut short.
+    """
+    buf = buffer if buffer is not None else bytearray(PARSE_BUFFER_SIZE)
+    view = memoryview(buf)
+    tags = None
+    fields = None  # The item being read
+    reused = None
+    fill = 0  # Bytes in the buffer
+    pos = 0  # Where the unread part of the buffer starts
+    scan_from = 0  # Where to resume looking for the item's closing tag
+    eof = False
+
+    while True:
+        if tags is None:
+            tags = detect_feed_format(buf, view, fill)
+            if tags is None:
+                pos = max(0, fill - FORMAT_OVERLAP)
+
+        if tags is not None:
+            item_start, item_end, names = tags
+            if fields is None:
+                index = find(buf, view, item_start, pos, fill)
+                if index != -1:
+                    pos = scan_from = index + len(item_start)
+                    fields = reused or ItemFields(names)
+                    fields.start(pos)
+                else:
+                    pos = max(pos, fill - len(item_start) + 1)
+
+            if fields is not None:
+                index = find(buf, view, item_end, scan_from, fill)
+                if index != -1:
+                    fields.scan(buf, view, index, True)
+                    pos = index + len(item_end)
+                    yield fields.item()
+                    reused, fields = fields, None
+                    continue
+                scan_from = max(scan_from, fill - len(item_end) + 1)
+
+        if eof:
+            return  # Anything left is an item truncated by the download cap
+
+        # Drop what has been read to make room for more
+        keep = pos
+        if fields is not None:
+            keep = min(pos, scan_from)
+            if keep == 0 and fill == len(buf):
+                keep = pos = fields.make_room(buf, view, fill, scan_from)
+        if keep:
+            fill = shift(view, keep, fill)
+            pos -= keep
+            scan_from = max(0, scan_from - keep)
+            if fields is not None:
+                fields.moved(keep)
+
+        n = f.readinto(view[fill:])
+        if not n:
+            eof = True
+        else:
+            fill += n
+
+
+def detect_feed_format(buf, view, end):
+    """Return the tag set for the feed once its first item or entry is visible."""
+    item = find(buf, view, b"<item>", 0, end)
+    entry = find(buf, view, b"<entry>", 0, end)
+    if entry != -1 and (item == -1 or entry < item):
+        return ATOM_TAGS
+    if item != -1:
+        return RSS_TAGS
+    return None
+
+
+def parse_item(buf, view, start, end, names):
+    """Return (title, description, link, date) for an item held whole in buf[start:end]."""
+    fields = ItemFields(names)
+    fields.start(start)
+    fields.scan(buf, view, end, True)
+    return fields.item()
+
+
+class ItemFields:
+    """The wanted fields of one item, captured as the item passes through the buffer.
+
+    Each field is the text of its first tag in the item, which may carry
+    attributes, e.g. <guid isPermaLink="false"> or <content type="html">.
+    """
+
+    def __init__(self, names):
+        self.openings, self.closings = names
+        self.values = [None] * len(self.openings)  # Text of each field once it's complete
+        self.opened = [False] * len(self.openings)
+        self.marks = [0] * len(self.openings)  # Where to look for the opening tag, or where the text starts
+
+    def start(self, start):
+        """Start on the item whose text begins at start."""
+        for i in range(len(self.values)):
+            self.values[i] = None
+            self.opened[i] = False
+            self.marks[i] = start
+
+    def scan(self, buf, view, end, final):
+        """Capture the fields complete before end. With final, end is the item's end."""
+        for i, value in enumerate(self.values):
+            if value is not None:
+                continue
+            mark = self.marks[i]
+            if not self.opened[i]:
+                opening = self.openings[i]
+                while True:
+                    index = find(buf, view, opening, mark, end)
+                    if index == -1:
+                        mark = max(mark, end - len(opening))
+                        break
+                    after = index + len(opening)
+                    if after >= end:
+                        mark = index  # Can't tell <link> from <linkedin> yet
+                        break
+                    if buf[after] not in b"> ":
+                        mark = after  # e.g. <linkedin>
+                        continue
+                    close = find(buf, view, b">", after, end)
+                    if close == -1:
+                        mark = index
+                    elif buf[close - 1] == 0x2F:
+                        self.values[i] = ""  # Self-closing, like Atom's <link href="..." />
+                    else:
+                        self.opened[i] = True
+                        mark = close + 1
+                    break
+            if self.opened[i]:
+                index = find(buf, view, self.closings[i], mark, end)
+                if index != -1:
+                    self.values[i] = decode(buf, view, mark, index)
+            self.marks[i] = mark
+            if final and self.values[i] is None:
+                self.values[i] = ""
+
+    def make_room(self, buf, view, fill, scan_from):
+        """Capture what a full buffer holds; return how many bytes can be dropped.
+
+        A field still open at the start of the buffer is longer than the buffer,
+        so it is cut at the end of it.
+        """
+        self.scan(buf, view, fill, False)
+        while True:
+            keep = scan_from
+            first = None
+            for i, value in enumerate(self.values):
+                if value is None and self.marks[i] < keep:
+                    keep = self.marks[i]
+                    first = i
+            if keep or first is None:
+                return keep
+            if self.opened[first]:
+                cut = fill
+                while cut > 0 and buf[cut - 1] & 0xC0 == 0x80:
+                    cut -= 1  # Don't split a UTF-8 sequence
+                if cut > 0 and buf[cut - 1] >= 0xC0:
+                    cut -= 1
+                self.values[first] = close_cdata(decode(buf, view, 0, cut))
+            else:
+                self.values[first] = ""  # An opening tag longer than the buffer
+
+    def moved(self, count):
+        """The buffer was shifted left by count bytes."""
+        for i, mark in enumerate(self.marks):
+            self.marks[i] = max(0, mark - count)
+
+    def item(self):
+        title, description, date = self.values[0], self.values[1], self.values[2]
+        link = ""
+        for value in self.values[3:]:
+            if value:
+                link = value
+                break
+        return title, description, link, date
+
+
+def parse_date(text):
+    """Return an RSS or Atom date as seconds since 2000-01-01 UTC, or 0 if it can't be read.
+
+    RSS uses RFC 822 dates, e.g. "Mon, 01 Oct 2023 09:30:00 +0100", and Atom
+    ISO 8601 ones, e.g. "2023-10-01T09:30:00+01:00".
+    """
+    try:
+        if text[4:5] == "-":
+            # ISO 8601: the time and zone are optional
+            year, month, day = int(text[0:4]), int(text[5:7]), int(text[8:10])
+            clock, zone = text[11:19], text[19:].lstrip(".0123456789")
+            offset = 0
+            if zone[:1] in ("+", "-"):
+                offset = int(zone[1:3]) * 60 + int(zone[4:6])
+                offset = -offset if zone[0] == "-" else offset
+        else:
+            parts = text.split()
+            if parts and parts[0].endswith(","):
+                parts = parts[1:]  # Day of the week
+            day, month, year = int(parts[0]), MONTHS.index(parts[1][:3].lower()) + 1, int(parts[2])
+            if year < 100:
+                year += 2000
+            clock = parts[3] if len(parts) > 3 else ""
+            zone = parts[4] if len(parts) > 4 else ""
+            offset = 0
+            if zone[:1] in ("+", "-"):
+                offset = int(zone[1:3]) * 60 + int(zone[3:5])
+                offset = -offset if zone[0] == "-" else offset
+            else:
+                offset = ZONES.get(zone, 0) * 60
+        seconds = 0
+        if clock:
+            fields = clock.split(":")
+            seconds = int(fields[0]) * 3600 + int(fields[1]) * 60
+            if len(fields) > 2:
+                seconds += int(fields[2])
+    except (ValueError, IndexError):
+        return 0
+    return max(0, days_since_2000(year, month, day) * 86400 + seconds - offset * 60)
+
+
+def days_since_2000(year, month, day):
+    """Days from 2000-01-01 to a date in the proleptic Gregorian calendar."""
+    if month < 3:
+        year -= 1
+        month += 12  # Count from March, so the leap day comes last
+    days = 365 * year + year // 4 - year // 100 + year // 400 + (153 * (month - 3) + 2) // 5 + day
+    return days - 730426  # The same count for 2000-01-01
+
+
+def decode(buf, view, start, end):
+    """Return buf[start:end] stripped and decoded, or "" if it isn't UTF-8."""
+    while start < end and buf[start] in WHITESPACE:
+        start += 1
+    while end > start and buf[end - 1] in WHITESPACE:
+        end -= 1
+    try:
+        return str(view[start:end], "utf-8")
+    except UnicodeError:
+        return ""
+
+
+def close_cdata(text):
+    """Close a CDATA section left open by cutting a field, as written or escaped in the feed."""
+    for start, end in (("<![CDATA[", "]]>"), ("&lt;![CDATA[", "]]&gt;")):
+        if text.rfind(start) > text.rfind(end):
+            return text + end
+    return text
+
+
+def find(buf, view, sub, start, end):
+    """Return the index of sub in buf[start:end], or -1.
+
+    MicroPython's bytearray has no find(), so there the view is searched a slice
+    at a time.
+    """
+    if HAS_FIND:
+        return buf.find(sub, start, end)
+    while start < end:
+        stop = min(start + FIND_SLICE + len(sub) - 1, end)
+        index = bytes(view[start:stop]).find(sub)
+        if index != -1:
+            return start + index
+        if stop == end:
+            break
+        start += FIND_SLICE
+    return -1
+
+
+def shift(view, start, end):
+    """Move view[start:end] to the front; return its length.
+
+    Copied in pieces that never overlap their destination, which MicroPython's
+    slice assignment doesn't allow for.
+    """
+    length = end - start
+    for i in range(0, length, start):
+        stop = min(i + start, length)
+        view[i:stop] = view[start + i : start + stop]
+    return length
+
+
+HAS_FIND = hasattr(bytearray, "find")
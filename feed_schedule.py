@@ -0,0 +1,75 @@
+RETRY_TIME = 60  # Seconds before the first retry of a failed fetch
+MAX_BACKOFF = 6 * 60 * 60  # Longest wait between retries of a failing feed
+MAX_SLOWDOWN = 4  # A feed with nothing new is fetched up to this many times less often
+
+
+class Feed:
+    """A feed in the registry, with its settings and refresh schedule."""
+
+    def __init__(self, name, url, category, interval, priority, max_items):
+        self.name = name
+        self.url = url
+        self.category = category
+        self.interval = interval  # Seconds between refreshes while it has new stories
+        self.priority = priority  # Higher is fetched first when several are due
+        self.max_items = max_items
+        self.wait = interval  # Current refresh interval, stretched while nothing is new
+        self.failures = 0
+        self.retry_at = 0  # time.time() before which a failing feed is left alone
+
+    def is_due(self, age, now):
+        """Whether to fetch, given the age of its cached items (None if there are none)."""
+        if now < self.retry_at:
+            return False
+        return age is None or age >= self.wait
+
+    def backing_off(self, now):
+        return now < self.retry_at
+
+    def fetched(self, new_stories):
+        """Record a successful fetch; feeds with nothing new are checked less often."""
+        self.failures = 0
+        self.retry_at = 0
+        if new_stories:
+            self.wait = self.interval
+        else:
+            self.wait = min(self.wait * 2, self.interval * MAX_SLOWDOWN)
+
+    def failed(self, now):
+        """Record a failed fetch; each one in a row doubles the wait before the next try."""
+        self.failures += 1
+        self.retry_at = now + min(RETRY_TIME << (self.failures - 1), MAX_BACKOFF)
+
+
+def build_registry(feeds, categories, settings, overrides=None):
+    """Index the feeds once: a list of Feed sorted by category, then name.
+
+    feeds maps name -> url, categories maps category -> feed names, and settings maps
+    category -> (interval, priority, max items). overrides maps a feed name to its
+    own settings. Feeds in no category are "Other".
+    """
+    category_of = {}
+    for category, names in categories.items():
+        for name in names:
+            category_of[name] = category
+    registry = []
+    for name, url in feeds.items():
+        category = category_of.get(name, "Other")
+        interval, priority, max_items = (overrides or {}).get(name) or settings[category]
+        registry.append(Feed(name, url, category, interval, priority, max_items))
+    registry.sort(key=lambda feed: (feed.category, feed.name))
+    return registry
+
+
+def due_feeds(registry, store, now, start, limit, skip=()):
+    """Up to limit feeds to fetch: the one at start first, then by priority and distance.
+
+    Feeds in skip, e.g. those already being fetched, are left out.
+    """
+    due = []
+    for offset in range(len(registry)):
+        feed = registry[(start + offset) % len(registry)]
+        if feed.name not in skip and feed.is_due(store.age(feed.name), now):
+            due.append((offset != 0, -feed.priority, offset, feed))
+    due.sort(key=lambda entry: entry[:3])
+    return [entry[3] for entry in due[:limit]]
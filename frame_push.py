@@ -0,0 +1,39 @@
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None  # Every frame is pushed
+
+from text_strip import framebuffer
+
+
+class FramePusher:
+    """Sends frames to the LEDs, skipping any that match the last one sent.
+
+    A frame is compared by the crc32 of the framebuffer and the brightness, which the
+    driver applies as it pushes. Pushing takes a full copy of the framebuffer, so
+    frames that repeat, e.g. while blank space scrolls by, leave that time to the
+    other tasks.
+    """
+
+    def __init__(self, gu, display):
+        self.gu = gu
+        self.display = display
+        self.fb = framebuffer(display) if crc32 else None
+        self.checksum = None  # Of the last frame pushed
+        self.brightness = None
+        self.pushed = 0
+        self.skipped = 0
+
+    def push(self):
+        """Send the frame unless nothing changed. Returns True if it was sent."""
+        if self.fb is not None:
+            checksum = crc32(self.fb)
+            brightness = self.gu.get_brightness()
+            if checksum == self.checksum and brightness == self.brightness:
+                self.skipped += 1
+                return False
+            self.checksum = checksum
+            self.brightness = brightness
+        self.gu.update(self.display)
+        self.pushed += 1
+        return True
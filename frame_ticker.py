@@ -0,0 +1,42 @@
+import time
+
+# MicroPython has these; CPython gets equivalents so the host scripts can run.
+# The other modules import them from here.
+ticks_ms = getattr(time, "ticks_ms", lambda: int(time.perf_counter() * 1000))
+ticks_us = getattr(time, "ticks_us", lambda: int(time.perf_counter() * 1000000))
+ticks_add = getattr(time, "ticks_add", lambda a, b: a + b)
+ticks_diff = getattr(time, "ticks_diff", lambda a, b: a - b)
+sleep_ms = getattr(time, "sleep_ms", lambda ms: time.sleep(ms / 1000))
+
+SUBPIXELS = 256  # Scroll positions are kept in 1/256 pixel steps to avoid floats
+
+
+class FrameTicker:
+    """Ticks on absolute deadlines, so render time doesn't stretch the frame period.
+
+    When a frame runs late the missed deadlines are skipped rather than queued up,
+    and tick() says how many periods passed so the caller can move things further.
+    """
+
+    def __init__(self, period_ms):
+        self.period_ms = period_ms
+        self.started = ticks_ms()
+        self.deadline = self.started  # When the next frame is due
+        self.frames = 0
+        self.late = 0  # Deadlines skipped because a frame ran long
+
+    def tick(self):
+        """Start a frame. Returns the number of frame periods since the last one."""
+        behind = ticks_diff(ticks_ms(), self.deadline)
+        skipped = behind // self.period_ms if behind > 0 else 0
+        self.deadline = ticks_add(self.deadline, (skipped + 1) * self.period_ms)
+        self.frames += 1
+        self.late += skipped
+        return skipped + 1
+
+    def remaining(self):
+        """Milliseconds until the next frame is due."""
+        return max(0, ticks_diff(self.deadline, ticks_ms()))
+
+    def elapsed(self):
+        return ticks_diff(ticks_ms(), self.started)
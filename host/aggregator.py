@@ -0,0 +1,183 @@
+"""Companion aggregator: fetches and cleans every feed on a PC and serves compact digests.
+
+The device can then download ready-to-display text instead of whole XML feeds, so
+feeds too big for its memory can be shown too. Run it on any machine on the LAN and
+set AGGREGATOR_URL in rss_display.py to point at it:
+
+    python host/aggregator.py [--port 8080] [--interval 900] [--offline]
+
+Every feed in rss_display.py is served, including the commented-out ones. Items are
+parsed and cleaned with the same feed_parser and text_cleanup code the device runs.
+--offline serves the generated host corpus instead of the live feeds, for tests.
+
+    GET /                       one line per feed: name, version, item count
+    GET /feed?name=BBC[&v=...]  the feed's digest (see digest.py), or 304 if v is current
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HOST))
+
+from corpus import DEFAULT_PROFILE, FEED_PROFILES, corpus, feed_urls  # noqa: E402
+from digest import DIGEST_MAX_LINE, format_header, format_item  # noqa: E402
+from feed_parser import parse_rss_data_from_file  # noqa: E402
+from seen_index import item_key  # noqa: E402
+from text_cleanup import cleanup_text  # noqa: E402
+
+MAX_ITEMS = 15  # Items per feed, as on the device
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 20  # Seconds
+REFRESH_INTERVAL = 10 * 60  # Seconds, as News feeds on the device
+
+digests = {}  # feed -> (version, item count, payload bytes)
+digests_lock = threading.Lock()
+
+
+def fetch(url):
+    full_url = url if "://" in url else "http://" + url
+    request = urllib.request.Request(full_url, headers={"User-Agent": "rss-display-aggregator"})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        return response.read()
+
+
+def fit_line(key, title, description, date=""):
+    """Format an item, shortening it until the line fits DIGEST_MAX_LINE bytes."""
+    date = " ".join(date.split())  # No tabs or newlines in a field
+    while True:
+        line = format_item(key, title, description, date)
+        excess = len(line.encode()) - DIGEST_MAX_LINE
+        if excess <= 0:
+            return line
+        if len(description) > excess + 3:
+            description = description[: -excess - 3].rstrip() + "..."
+        elif description:
+            description = ""
+        else:
+            title = title[:-excess]
+
+
+def build_digest(body, max_items=MAX_ITEMS):
+    """Parse and clean a feed document into (version, item count, digest bytes)."""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "feed.xml")
+        with open(path, "wb") as f:
+            f.write(body)
+        lines = []
+        for title, description, link, date in parse_rss_data_from_file(path):
+            key = item_key(title, link)
+            lines.append(fit_line(key, cleanup_text(title), cleanup_text(description), date))
+            if len(lines) == max_items:
+                break
+    items = "".join(lines)
+    version = format(zlib.crc32(items.encode()), "08x")  # Changes only when the items do
+    return version, len(lines), (format_header(version, len(lines)) + items).encode()
+
+
+def refresh(sources, max_items=MAX_ITEMS):
+    """Fetch every (name, loader) concurrently and replace the served digests."""
+
+    def update(source):
+        name, load = source
+        started = time.perf_counter()
+        try:
+            digest = build_digest(load(), max_items)
+        except Exception as e:
+            print(f"{name}: {e}")
+            return
+        with digests_lock:
+            changed = digests.get(name, (None,))[0] != digest[0]
+            digests[name] = digest
+        print(
+            f"{name}: {digest[1]} items, {len(digest[2])} bytes, version {digest[0]}"
+            f"{'' if changed else ' (unchanged)'}, {time.perf_counter() - started:.1f}s"
+        )
+
+    with ThreadPoolExecutor(FETCH_WORKERS) as pool:
+        list(pool.map(update, sources))
+
+
+def live_sources():
+    return [(name, lambda url=url: fetch(url)) for name, url in feed_urls()]
+
+
+def offline_sources():
+    """The native-format corpus document of each feed, read from disk."""
+    sources = {}
+    for name, url, fmt, path in corpus():
+        if fmt == FEED_PROFILES.get(name, DEFAULT_PROFILE)[2]:
+
+            def load(path=path):
+                with open(path, "rb") as f:
+                    return f.read()
+
+            sources[name] = load
+    return list(sources.items())
+
+
+class DigestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        request = urlparse(self.path)
+        if request.path == "/":
+            with digests_lock:
+                listing = "".join(
+                    f"{name}\t{version}\t{count}\n"
+                    for name, (version, count, payload) in sorted(digests.items())
+                )
+            self.reply(200, listing.encode())
+            return
+        if request.path != "/feed":
+            self.reply(404, b"Not found\n")
+            return
+        query = parse_qs(request.query)
+        name = query.get("name", [""])[0]
+        with digests_lock:
+            digest = digests.get(name)
+        if digest is None:
+            self.reply(404, b"Unknown feed\n")
+        elif query.get("v", [None])[0] == digest[0]:
+            self.reply(304, b"")
+        else:
+            self.reply(200, digest[2])
+
+    def reply(self, status, body):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    port = 8080
+    interval = REFRESH_INTERVAL
+    if "--port" in sys.argv:
+        port = int(sys.argv[sys.argv.index("--port") + 1])
+    if "--interval" in sys.argv:
+        interval = int(sys.argv[sys.argv.index("--interval") + 1])
+    sources = offline_sources() if "--offline" in sys.argv else live_sources()
+
+    refresh(sources)
+
+    def refresh_forever():
+        while True:
+            time.sleep(interval)
+            refresh(sources)
+
+    threading.Thread(target=refresh_forever, daemon=True).start()
+    server = ThreadingHTTPServer(("", port), DigestHandler)
+    print(f"Serving {len(digests)} feed digests on port {port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
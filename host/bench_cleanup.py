@@ -0,0 +1,102 @@
+"""Compare cleanup_text against the previous multi-pass version on sample descriptions.
+
+Run from the repository root with CPython:
+
+    python host/bench_cleanup.py [--show]
+"""
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from text_cleanup import cleanup_text  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ROUNDS = 2000
+
+
+def legacy_cleanup_text(text):
+    """cleanup_text as it was before the single-pass entity decoder."""
+    text = re.sub(r"<!\[CDATA\[(.*?)\]\]>", r"\1", text)
+    replacements = {
+        "&lt;": "<",
+        "&gt;": ">",
+        "&amp;mdash;": "—",
+        "&amp;ndash;": "–",
+        "&hellip;": "...",
+        "&quot;": '"',
+        "&#39;": "'",
+        "&ldquo;": '"',
+        "&rdquo;": '"',
+        "&lsquo;": "'",
+        "&rsquo;": "'",
+        "&euro;": "€",
+        "&pound;": "£",
+        "&yen;": "¥",
+        "&#8216;": "'",
+        "&#8217;": "'",
+        "&#038;": "&",
+        "&#8230;": "...",
+        "&#38;": "&",
+        "&amp;": "&",
+    }
+    text = re.sub(r"&lt;.*?&gt;", "", text)
+    text = text.replace("&amp;nbsp;", " ")
+    text = text.replace("&nbsp;", " ")
+    for entity, replacement in replacements.items():
+        text = text.replace(entity, replacement)
+    while "<" in text and ">" in text:
+        start = text.find("<")
+        end = text.find(">")
+        if start < end:
+            text = text[:start] + text[end + 1 :]
+        else:
+            break
+    text = re.sub(r"<[^>]*$", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.replace("‘", "'").replace("’", "'")
+
+
+def load_descriptions(filename="descriptions.txt"):
+    with open(os.path.join(FIXTURES, filename), encoding="utf-8") as f:
+        return [d.strip("\n") for d in f.read().split("\n---\n")]
+
+
+def measure(func, samples):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text in samples:
+            func(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for text in samples:
+        func(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    calls = ROUNDS * len(samples)
+    size = ROUNDS * sum(len(t) for t in samples)
+    return elapsed / calls * 1e6, size / elapsed / 1e6, peak
+
+
+def main():
+    samples = load_descriptions()
+    print(f"{len(samples)} descriptions, {sum(len(t) for t in samples)} characters")
+    print(f"{'version':<10}{'us/call':>10}{'Mchar/s':>10}{'peak B':>10}")
+    for name, func in (("legacy", legacy_cleanup_text), ("current", cleanup_text)):
+        per_call, throughput, peak = measure(func, samples)
+        print(f"{name:<10}{per_call:>10.1f}{throughput:>10.2f}{peak:>10}")
+
+    if "--show" in sys.argv:
+        for text in samples:
+            print("-" * 40)
+            print("legacy: ", legacy_cleanup_text(text))
+            print("current:", cleanup_text(text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Benchmark the fetch, parse and clean stages on the feed corpus and catch regressions.
+
+Runs on CPython with the stand-in modules in host/standins, so nothing touches the
+network or the display. For each stage it reports time, throughput, peak traced
+memory and an approximate allocation count, then compares them with
+host/bench_baseline.json and exits non-zero if any got worse:
+
+    python host/bench_pipeline.py [--per-feed] [--update] [--time-tolerance 0.5]
+
+Allocation counts are the sum of increases in live memory blocks between executed
+lines, so short-lived temporaries within one line are not counted. They are stable
+from run to run, which makes them a better regression signal than time.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+from checks import CannedResponse  # noqa: E402
+from corpus import corpus  # noqa: E402
+from feed_fetch import FETCH_CHUNK_SIZE, Download  # noqa: E402
+from feed_parser import ATOM_TAGS, RSS_TAGS, parse_item, parse_rss_data_from_file  # noqa: E402
+from text_cleanup import cleanup_text, replace_html_entities, strip_markup  # noqa: E402
+
+BASELINE = os.path.join(HOST, "bench_baseline.json")
+REPEATS = 3
+MEMORY_TOLERANCE = 0.10  # Peak memory and allocation counts may grow this much
+
+
+def count_allocations(func):
+    """Run func and return the number of memory blocks it allocated, approximately."""
+    blocks = sys.getallocatedblocks
+    total = 0
+    last = blocks()
+
+    def tracer(frame, event, arg):
+        nonlocal total, last
+        now = blocks()
+        if now > last:
+            total += now - last
+        last = now
+        return tracer
+
+    sys.settrace(tracer)
+    try:
+        func()
+    finally:
+        sys.settrace(None)
+    return total
+
+
+def measure(func):
+    """Return (best time in seconds, peak traced bytes, allocation count) for func."""
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak, count_allocations(func)
+
+
+def raw_items(body, fmt):
+    marker = b"<entry>" if fmt == "atom" else b"<item>"
+    return [bytearray(item) for item in body.split(marker)[1:]]
+
+
+def stages(document, workdir):
+    """Return (stage name, function, bytes processed) for one corpus document."""
+    name, url, fmt, path = document
+    with open(path, "rb") as f:
+        body = f.read()
+    items = list(parse_rss_data_from_file(path))
+    texts = [t for item in items for t in item[:2]]
+    decoded = [replace_html_entities(t) for t in texts]
+    chunks = raw_items(body, fmt)
+    names = (ATOM_TAGS if fmt == "atom" else RSS_TAGS)[2]
+    target = os.path.join(workdir, "rss_data.xml")
+
+    def fetch():
+        # Chunks handed to save() as Prefetch.download does with a pooled response
+        response = CannedResponse(body)
+        download = Download(response, target)
+        buf = bytearray(FETCH_CHUNK_SIZE)
+        while not download.save(buf, response.body.readinto(buf)):
+            pass
+        download.close()
+
+    def parse():
+        for _ in parse_rss_data_from_file(path):
+            pass
+
+    def extract():
+        for chunk in chunks:
+            parse_item(chunk, memoryview(chunk), 0, len(chunk), names)
+
+    def entities():
+        for text in texts:
+            replace_html_entities(text)
+
+    def tags():
+        for text in decoded:
+            strip_markup(text)
+
+    def clean():
+        for text in texts:
+            cleanup_text(text)
+
+    text_size = sum(len(t) for t in texts)
+    return [
+        ("fetch", fetch, len(body)),
+        ("parse", parse, len(body)),
+        ("extract", extract, len(body)),
+        ("entities", entities, text_size),
+        ("tags", tags, text_size),
+        ("clean", clean, text_size),
+    ]
+
+
+def run(per_feed=False):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = corpus()
+        if per_feed:
+            print(f"{'feed':<12}{'fmt':<6}{'stage':<10}{'ms':>9}{'peak KB':>9}{'allocs':>9}")
+        for document in documents:
+            for stage, func, size in stages(document, workdir):
+                seconds, peak, allocs = measure(func)
+                total = results.setdefault(
+                    stage, {"seconds": 0.0, "bytes": 0, "peak": 0, "allocs": 0}
+                )
+                total["seconds"] += seconds
+                total["bytes"] += size
+                total["peak"] = max(total["peak"], peak)
+                total["allocs"] += allocs
+                if per_feed:
+                    print(
+                        f"{document[0]:<12}{document[2]:<6}{stage:<10}"
+                        f"{seconds * 1000:>9.2f}{peak / 1024:>9.1f}{allocs:>9}"
+                    )
+    return results
+
+
+def report(results, baseline, time_tolerance):
+    regressions = []
+    print(f"{'stage':<10}{'ms':>10}{'MB/s':>8}{'peak KB':>9}{'allocs':>9}   vs baseline")
+    for stage, r in results.items():
+        base = baseline.get(stage)
+        notes = []
+        if base:
+            limits = (
+                ("seconds", time_tolerance),
+                ("peak", MEMORY_TOLERANCE),
+                ("allocs", MEMORY_TOLERANCE),
+            )
+            for key, tolerance in limits:
+                if tolerance is None or not base[key]:
+                    continue
+                change = r[key] / base[key] - 1
+                notes.append(f"{key} {change:+.0%}")
+                if change > tolerance:
+                    regressions.append(f"{stage} {key} {change:+.0%}")
+        throughput = r["bytes"] / r["seconds"] / 1e6 if r["seconds"] else 0
+        print(
+            f"{stage:<10}{r['seconds'] * 1000:>10.1f}{throughput:>8.2f}"
+            f"{r['peak'] / 1024:>9.1f}{r['allocs']:>9}   {', '.join(notes) or 'new'}"
+        )
+    return regressions
+
+
+def main():
+    time_tolerance = 0.5
+    if "--time-tolerance" in sys.argv:
+        value = sys.argv[sys.argv.index("--time-tolerance") + 1]
+        time_tolerance = None if value == "off" else float(value)
+
+    results = run(per_feed="--per-feed" in sys.argv)
+
+    if "--update" in sys.argv:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE}")
+
+    try:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    except OSError:
+        baseline = {}
+
+    regressions = report(results, baseline, time_tolerance)
+    if regressions:
+        print("Regressions: " + "; ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
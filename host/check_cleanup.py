@@ -0,0 +1,54 @@
+"""Check that cleanup_text matches the reference implementation on the fixtures.
+
+Run from the repository root with CPython. Exits non-zero on any mismatch:
+
+    python host/check_cleanup.py [--fuzz N]
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from text_cleanup import cleanup_text  # noqa: E402
+from reference_cleanup import cleanup_text as reference_cleanup_text  # noqa: E402
+from bench_cleanup import load_descriptions  # noqa: E402
+
+# Pieces the fuzzer glues together, weighted towards markup edge cases
+FUZZ_PIECES = [
+    "<", ">", "<b>", "</b>", "<a href='x'>", " ", "  ", "\n", "\t", "word", "x",
+    "&lt;", "&gt;", "&amp;", "&amp;nbsp;", "&#8217;", "&#x2014;", "&bogus;", "&",
+    "<![CDATA[", "]]>", "’", "é", "…",
+]
+
+
+def fuzz_cases(count, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(1, 30)))
+
+
+def main():
+    count = 5000
+    if "--fuzz" in sys.argv:
+        count = int(sys.argv[sys.argv.index("--fuzz") + 1])
+
+    cases = load_descriptions() + load_descriptions("pathological.txt")
+    cases += list(fuzz_cases(count))
+    failures = 0
+    for text in cases:
+        expected = reference_cleanup_text(text)
+        actual = cleanup_text(text)
+        if actual != expected:
+            failures += 1
+            if failures <= 10:
+                print(f"Mismatch for {text!r}")
+                print(f"  expected {expected!r}")
+                print(f"  actual   {actual!r}")
+
+    print(f"{len(cases)} cases, {failures} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
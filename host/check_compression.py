@@ -0,0 +1,176 @@
+"""Check compressed feed downloads against a local HTTP server serving the host corpus.
+
+Each corpus feed is fetched as sent plainly and gzip, zlib and raw deflate
+compressed, through the connection pool as rss_display does, and the stored
+items must match. Range requests cut the compressed body as a real server would,
+and a body compressed without being asked for is inflated all the same.
+The bytes received and the time taken are reported for each encoding:
+
+    python host/check_compression.py
+"""
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+import uasyncio  # noqa: E402
+import feed_fetch  # noqa: E402
+import inflate  # noqa: E402
+from checks import check, finish, quiet  # noqa: E402
+from corpus import corpus  # noqa: E402
+from feed_fetch import Prefetch  # noqa: E402
+from http_pool import ConnectionPool  # noqa: E402
+from item_store import ItemStore  # noqa: E402
+
+ENCODINGS = ("identity", "gzip", "deflate", "raw")
+documents = {}  # path -> feed document bytes
+
+def encode(body, encoding):
+    """The body as sent with an encoding; "raw" is deflate without the zlib header."""
+    if encoding == "gzip":
+        return gzip.compress(body)
+    if encoding == "deflate":
+        return zlib.compress(body)
+    if encoding == "raw":
+        compressor = zlib.compressobj(wbits=-15)
+        return compressor.compress(body) + compressor.flush()
+    return body
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """GET /<encoding>/<feed file>, honouring Range on the encoded body.
+
+    The "forced" encoding is gzip whether or not the request accepts it.
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the feeds' servers
+
+    def do_GET(self):
+        _, encoding, name = self.path.split("/", 2)
+        body = documents.get(name)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if encoding == "forced":
+            encoding = "gzip"
+        elif encoding != "identity" and "gzip" not in self.headers.get("Accept-Encoding", ""):
+            encoding = "identity"  # Not asked for
+        body = encode(body, encoding)
+        status = 200
+        if self.headers.get("Range", "").startswith("bytes=0-"):
+            last = int(self.headers["Range"][8:])
+            if last + 1 < len(body):
+                body, status = body[: last + 1], 206
+        self.send_response(status)
+        if encoding != "identity":
+            self.send_header("Content-Encoding", "deflate" if encoding == "raw" else encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def stored(store, feed):
+    items = store.items(feed)
+    records = list(items)
+    items.close()
+    return records
+
+
+async def fetch_all(base, workdir, encodings=ENCODINGS):
+    """Fetch every document with each encoding: {encoding: (records, received, seconds)}."""
+    store = ItemStore(os.path.join(workdir, "store"), budget=10 * 1024 * 1024)
+    pool = ConnectionPool()
+    results = {}
+    for encoding in encodings:
+        received = 0
+        started = time.perf_counter()
+        records = {}
+        for name in documents:
+            feed = f"{encoding}-{name}"
+            url = f"{base}/{encoding}/{name}"
+            job = Prefetch(feed, url, store, os.path.join(workdir, "feed.xml"))
+            await job.download(pool)
+            received += job._download.received if job._download else 0
+            while not job.done:
+                job.step(blocking=True)
+            records[name] = stored(store, feed)
+        results[encoding] = (records, received, time.perf_counter() - started)
+    pool.close()
+    return results
+
+
+def main():
+    for name, url, fmt, path in corpus():
+        with open(path, "rb") as f:
+            documents[os.path.basename(path)] = f.read()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.handle_error = lambda request, address: None  # Pooled connections closed at the end
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with quiet():  # Fetch progress
+            results = uasyncio.run(fetch_all(base, workdir))
+
+        plain = results["identity"][0]
+        for encoding in ENCODINGS:
+            records, received, seconds = results[encoding]
+            print(f"{encoding:<10}{received:>10} bytes received {seconds * 1000:>8.0f}ms")
+        for encoding in ENCODINGS[1:]:
+            records = results[encoding][0]
+            check(
+                f"{encoding} stores the same items",
+                all(records[name] == plain[name] and plain[name] for name in documents),
+            )
+        check(
+            "compressed bodies are smaller",
+            results["gzip"][1] * 2 < results["identity"][1],
+        )
+        check("every inflater is released", inflate.active == 0)
+
+        # With no inflater free nothing compressed is asked for, but one is found if it comes anyway
+        max_inflaters = feed_fetch.MAX_INFLATERS
+        feed_fetch.MAX_INFLATERS = 0
+        with quiet():
+            records = uasyncio.run(fetch_all(base, workdir, ("forced",)))["forced"][0]
+        feed_fetch.MAX_INFLATERS = max_inflaters
+        check("a body compressed unasked is inflated", records == plain and inflate.active == 0)
+
+    # Short of heap for a window, the plain body is asked for
+    feed_fetch.mem_free = lambda: feed_fetch.INFLATE_MIN_FREE - 1
+    check("no inflater without the heap for its window", feed_fetch.new_inflater() is None)
+    feed_fetch.mem_free = None
+
+    # A compressed body cut short inflates to a prefix of the document
+    body = max(documents.values(), key=len)
+    inflater = inflate.Inflater()
+    inflater.write(encode(body, "gzip")[:2000])
+    inflater.end()
+    out = b""
+    buf = bytearray(512)
+    while not inflater.done:
+        n = inflater.readinto(buf)
+        out += buf[:n]
+    inflater.close()
+    check("a cut body inflates to a prefix", len(out) > 2000 and body.startswith(out))
+
+    server.shutdown()
+    finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Check the device's digest reader against the aggregator serving the host corpus.
+
+The aggregator's digests are built from the corpus as `aggregator.py --offline`
+does and served from a local HTTP server. DigestFetch reads each one through the
+connection pool as rss_display does, with chunks small enough to split every
+line, and must store exactly the digest's items. Digests whose version is
+current come back 304 and only mark the feed as fetched, a changed digest
+replaces the cached one, dates are stored as the device parses them, and a line
+longer than DIGEST_MAX_LINE is rejected:
+
+    python host/check_digest.py
+"""
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+import uasyncio  # noqa: E402
+import aggregator  # noqa: E402
+from checks import check, finish, quiet  # noqa: E402
+from digest import DIGEST_MAX_LINE, format_header, format_item, parse_item  # noqa: E402
+from feed_fetch import DigestFetch  # noqa: E402
+from feed_parser import parse_date  # noqa: E402
+from http_pool import BufferPool, ConnectionPool  # noqa: E402
+from item_store import ItemStore  # noqa: E402
+
+CHUNK_SIZE = 61  # Bytes read at a time, so lines split across chunks in every way
+
+requested = []  # Paths asked of the aggregator
+
+
+class Handler(aggregator.DigestHandler):
+    def do_GET(self):
+        requested.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def stored(store, feed):
+    items = store.items(feed)
+    records = list(items)
+    items.close()
+    return records
+
+
+def expected(feed):
+    """The digest's items as the store holds them, newest first: (title, description, key, date)."""
+    lines = aggregator.digests[feed][2].decode().split("\n")[1:-1]
+    records = [
+        (title, description, key, str(parse_date(date)))
+        for key, title, description, date in map(parse_item, lines)
+    ]
+    return sorted(records, key=lambda record: -int(record[3]))
+
+
+async def download_all(base, store, buffers):
+    pool = ConnectionPool()
+    jobs = [DigestFetch(feed, base, store) for feed in sorted(aggregator.digests)]
+    await uasyncio.gather(*(job.download(pool, buffers) for job in jobs))
+    pool.close()
+    return jobs
+
+
+def fetch_all(base, store, buffers):
+    """Fetch every feed's digest at once through one pool; return the jobs."""
+    with quiet():
+        return uasyncio.run(download_all(base, store, buffers))
+
+
+def fetch_line(base, store, buffers, version, line):
+    """Serve a digest of one item line as the feed "Line" and fetch it."""
+    aggregator.digests["Line"] = (version, 1, (format_header(version, 1) + line).encode())
+    job = DigestFetch("Line", base, store)
+    with quiet():
+        uasyncio.run(job.download(ConnectionPool(), buffers))
+
+
+def main():
+    with quiet():  # Refresh progress
+        aggregator.refresh(aggregator.offline_sources())
+    feeds = sorted(aggregator.digests)
+    longest = max(len(line) for _, _, payload in aggregator.digests.values() for line in payload.split(b"\n"))
+    check("the aggregator's lines fit DIGEST_MAX_LINE", longest + 1 <= DIGEST_MAX_LINE)
+    check("some lines span several chunks", longest > 2 * CHUNK_SIZE)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.handle_error = lambda request, address: None  # Pooled connections closed at the end
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    buffers = BufferPool(2, CHUNK_SIZE)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ItemStore(os.path.join(workdir, "store"), budget=10 * 1024 * 1024)
+        jobs = fetch_all(base, store, buffers)
+        same = all(job.done and stored(store, job.feed) == expected(job.feed) for job in jobs)
+        check("every digest is stored line for line", same and all(job.count for job in jobs))
+        versions = all(store.versions.get(feed) == aggregator.digests[feed][0] for feed in feeds)
+        check("each digest's version is kept", versions)
+        check("feed names are quoted", any("name=The%20Verge" in path for path in requested))
+        dated = all(int(record[3]) for feed in feeds for record in stored(store, feed))
+        check("every story keeps its date", dated)
+
+        # Current versions come back unchanged: nothing is rewritten, the feeds count as fetched
+        for feed in feeds:
+            store.index[feed][0] = 0
+        del requested[:]
+        jobs = fetch_all(base, store, buffers)
+        sent = all(f"&v={aggregator.digests[feed][0]}" in path for feed, path in zip(feeds, sorted(requested)))
+        check("the version goes back with the next request", sent and len(requested) == len(feeds))
+        check(
+            "an unchanged digest only marks the feed fetched",
+            all(job.done and store.age(job.feed) < 60 for job in jobs)
+            and all(job.count == len(expected(job.feed)) for job in jobs)
+            and all(stored(store, feed) == expected(feed) for feed in feeds),
+        )
+
+        # A changed digest replaces the cached one
+        feed = feeds[0]
+        date = "Sat, 01 Jan 2033 00:00:00 GMT"
+        items = format_item("42", "Changed", "A new story", date) + format_item("43", "Another", "")
+        aggregator.digests[feed] = ("changed", 2, (format_header("changed", 2) + items).encode())
+        jobs = fetch_all(base, store, buffers)
+        check(
+            "a changed digest replaces the cached items",
+            stored(store, feed)
+            == [("Changed", "A new story", "42", str(parse_date(date))), ("Another", "", "43", "0")]
+            and store.versions[feed] == "changed",
+        )
+
+        # An evicted feed is fetched whole again, not left on a 304 with nothing cached
+        feed = feeds[1]
+        budget = store.budget
+        store.index[feed][1] = 0  # Least recently used
+        store.budget = sum(entry[2] for entry in store.index.values()) - 1
+        with quiet():
+            store.evict()
+        store.budget = budget
+        evicted = not store.has(feed) and feed not in store.versions
+        del requested[:]
+        fetch_all(base, store, buffers)
+        asked = [path for path in requested if f"name={feed}" in path.replace("%20", " ")]
+        check(
+            "an evicted feed's version isn't sent",
+            evicted and asked and "&v=" not in asked[0] and stored(store, feed) == expected(feed),
+        )
+
+        # A line of DIGEST_MAX_LINE bytes is stored; one byte more is refused, keeping the cache
+        padding = DIGEST_MAX_LINE - len(format_item("44", "Longest", ""))
+        fetch_line(base, store, buffers, "max", format_item("44", "Longest", "x" * padding))
+        check("a line of DIGEST_MAX_LINE is stored", stored(store, "Line")[0][2] == "44")
+        fetch_line(base, store, buffers, "over", format_item("45", "Longest", "x" * (padding + 1)))
+        check("a longer line is refused", stored(store, "Line")[0][2] == "44")
+
+    server.shutdown()
+    finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Check NetworkManager against the network, rp2 and machine stand-ins.
+
+Run from the repository root with CPython. Exits non-zero if any check fails:
+
+    python host/check_network.py
+"""
+import os
+import sys
+import tempfile
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+import network  # noqa: E402
+import uasyncio  # noqa: E402
+import network_manager  # noqa: E402
+from checks import check, finish  # noqa: E402
+from network_manager import NetworkManager  # noqa: E402
+
+SSID, PASSWORD = "home", "secret"
+BSSID = b"\x10\x20\x30\x40\x50\x60"
+
+network_manager.POLL_MS = 1  # Keep the checks quick
+network_manager.REJOIN_TIMEOUT = 0.2
+
+def reset(delay=0):
+    network.access_points[:] = [(SSID, PASSWORD, BSSID, 6, -40), (SSID, PASSWORD, b"\x99" * 6, 11, -70)]
+    network.join_delay = delay
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(False)
+    wlan._joins = 0
+    wlan._scans = 0
+    return wlan
+
+
+async def main(workdir):
+    link_file = os.path.join(workdir, "wifi.json")
+    statuses = []
+    errors = []
+
+    def on_status(mode, status, ip):
+        if status is not None:
+            statuses.append(status)
+
+    def on_error(mode, msg):
+        errors.append(msg)
+        return True
+
+    # A first join remembers the access point it joined, without a blocking scan
+    wlan = reset(delay=3)
+    manager = NetworkManager(status_handler=on_status, error_handler=on_error, link_file=link_file)
+    await manager.client(SSID, PASSWORD)
+    check("connects without blocking", manager.isconnected() and statuses[-1] is True)
+    check(
+        "remembers the access point joined",
+        manager._link.get("channel") == 6 and manager._link.get("bssid") == BSSID.hex() and not wlan._scans,
+    )
+
+    # After a restart the remembered access point is joined directly
+    wlan = reset()
+    manager = NetworkManager(status_handler=on_status, error_handler=on_error, link_file=link_file)
+    await manager.client(SSID, PASSWORD)
+    check("rejoins the remembered access point", wlan._config["bssid"] == BSSID and wlan._joins == 1)
+
+    # A remembered access point that has gone falls back to a full join
+    wlan = reset()
+    network.access_points[:] = [(SSID, PASSWORD, b"\x77" * 6, 1, -50)]
+    await manager.client(SSID, PASSWORD)
+    check("falls back when the access point has gone", manager.isconnected() and wlan._joins == 2)
+
+    # A wrong password fails at once rather than after the timeout
+    wlan = reset(delay=2)
+    errors.clear()
+    await uasyncio.wait_for(manager.client(SSID, "wrong"), 2)
+    check("reports a wrong password quickly", errors and not manager.isconnected())
+
+    # The monitor notices a dropped link and reconnects
+    wlan = reset()
+    await manager.client(SSID, PASSWORD)
+    statuses.clear()
+    monitor = uasyncio.create_task(manager.monitor(SSID, PASSWORD, interval=0.01))
+    await uasyncio.sleep(0.05)
+    wlan.drop()
+    for _ in range(100):
+        await uasyncio.sleep(0.01)
+        if False in statuses and statuses[-1] is True:
+            break  # The reconnect has been reported, not just made
+    monitor.cancel()
+    check("reconnects after the link drops", manager.isconnected() and statuses[-2:] == [False, True])
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as workdir:
+        uasyncio.run(main(workdir))
+    finish()
@@ -0,0 +1,137 @@
+"""Check the merged timeline of cached feeds against the host corpus.
+
+Corpus feeds are stored as the device stores them. Each feed must come back
+newest first, and the timeline must yield every story once, newest first, while
+holding no more than one entry per feed. Category subsets, undated stories, a
+feed refetched part way through and the store's bookkeeping around open readers
+are covered too:
+
+    python host/check_timeline.py
+"""
+import os
+import sys
+import tempfile
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+from checks import check, download, finish, quiet  # noqa: E402
+from corpus import corpus  # noqa: E402
+from feed_fetch import Prefetch  # noqa: E402
+from feed_parser import parse_date  # noqa: E402
+from item_store import ItemStore, record_date  # noqa: E402
+from seen_index import SeenIndex  # noqa: E402
+from timeline import Timeline  # noqa: E402
+
+FEEDS = 6  # Corpus documents stored
+
+def stored(store, feed):
+    items = store.items(feed)
+    records = list(items)
+    items.close()
+    return records
+
+
+def drain(timeline):
+    """Take every entry; return them and the most entries the heap held."""
+    taken = []
+    largest = 0
+    while True:
+        largest = max(largest, len(timeline.heap))
+        entry = timeline.next()
+        if entry is None:
+            return taken, largest
+        taken.append(entry)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ItemStore(os.path.join(workdir, "store"), budget=10 * 1024 * 1024)
+        names = []
+        with quiet():  # Fetch progress
+            for name, url, fmt, path in corpus()[: FEEDS * 2]:
+                feed = f"{name}-{fmt}"
+                job = Prefetch(feed, url, store, os.path.join(workdir, "feed.xml"))
+                download(job, {url: path})
+                while not job.done:
+                    job.step(blocking=True)
+                names.append(feed)
+
+        runs = {feed: [record_date(record) for record in stored(store, feed)] for feed in names}
+        check("every story has a date", all(all(run) for run in runs.values()))
+        newest_first = all(run == sorted(run, reverse=True) for run in runs.values())
+        check("each feed is stored newest first", newest_first)
+        rss, atom = runs[names[0]], runs[names[1]]
+        check("RSS and Atom dates agree", rss == atom and names[1].endswith("atom"))
+
+        taken, largest = drain(Timeline(store, names))
+        dates = [record_date(record) for feed, record in taken]
+        check("the timeline is newest first", dates == sorted(dates, reverse=True))
+        everything = sorted((feed, record) for feed in names for record in stored(store, feed))
+        check("every story comes once", sorted(taken) == everything)
+        check("one entry per feed is held", largest <= len(names))
+
+        subset = names[2:5]
+        taken, _ = drain(Timeline(store, subset))
+        check("a category shows only its feeds", {feed for feed, record in taken} == set(subset))
+
+        # Stories without dates, as cached before dates were parsed, keep their order last
+        writer = store.writer("undated")
+        for i in range(3):
+            writer.append(f"Undated {i}", "", str(1000 + i))
+        writer.commit()
+        taken, _ = drain(Timeline(store, [names[0], "undated"]))
+        check(
+            "undated stories come last in order",
+            [record[0] for feed, record in taken[-3:]] == ["Undated 0", "Undated 1", "Undated 2"],
+        )
+
+        # A feed refetched part way through: its fresh story comes next, seen ones don't repeat
+        seen = SeenIndex(os.path.join(workdir, "seen.bin"))
+        timeline = Timeline(store, names, seen)
+        shown = []
+        for _ in range(5):
+            feed, record = timeline.next()
+            seen.add(int(record[2]))
+            shown.append((feed, record[2]))
+        refetched = shown[0][0]
+        fresh = ("Fresh story", "", "7", str(parse_date("Sat, 01 Jan 2033 00:00:00 GMT")))
+        writer = store.writer(refetched)
+        writer.append(*fresh)
+        for record in stored(store, refetched):
+            writer.append(*record)
+        writer.commit()
+        store.index[refetched][0] = timeline.fetched[refetched] + 60  # As if a minute later
+        check("a fresh story comes next", timeline.next() == (refetched, fresh))
+        rest, _ = drain(timeline)
+        # The RSS and Atom copies of a feed share their keys, so keys are told apart by feed
+        keys = shown + [(refetched, "7")] + [(feed, record[2]) for feed, record in rest]
+        check("nothing is shown twice after a refetch", len(keys) == len(set(keys)))
+
+        # A refetch waiting on an open reader counts against the budget, and the read is saved
+        feed = names[0]
+        items = store.items(feed)
+        next(items)
+        writer = store.writer(feed)
+        for record in stored(store, feed):
+            writer.append(*record)
+        store.budget = sum(entry[2] for entry in store.index.values())
+        cached = len(store.index)
+        with quiet():  # Evictions
+            writer.commit()
+        check("a pending refetch counts against the budget", feed in store.pending and len(store.index) < cached)
+        items.close()
+        store.index[feed][1] = 1  # Used long ago
+        store.save_index()
+        items = store.items(feed)
+        next(items)
+        items.close()
+        check("a finished read is saved", ItemStore(store.directory).index[feed][1] > 1)
+
+    check("unreadable dates are 0", parse_date("yesterday") == 0 and parse_date("") == 0)
+    finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Check URL normalization and the redirect and address cache against a local HTTP server.
+
+Feeds that redirect permanently must be fetched from where they lead on the
+next try, over one connection, even after a restart. Temporary redirects are
+followed every time, stale redirects and addresses are forgotten, and a server
+that stalls mid-body gives up its connection:
+
+    python host/check_urls.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+import uasyncio  # noqa: E402
+import http_pool  # noqa: E402
+from checks import check, finish  # noqa: E402
+from http_pool import ConnectionPool, normalize_url  # noqa: E402
+from url_cache import UrlCache  # noqa: E402
+
+BODY = b"<rss><item><title>Hello</title></item></rss>"
+ROUTES = {  # path -> (status, location)
+    "/old": (301, "/feed.xml"),
+    "/hop": (308, "/old"),
+    "/temp": (302, "/feed.xml"),
+    "/moved": (301, "/soon-gone"),
+}
+requested = []  # Paths in the order they were asked for
+connections = []
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the feeds' servers
+
+    def setup(self):
+        connections.append(self.client_address)
+        super().setup()
+
+    def do_GET(self):
+        requested.append(self.path)
+        status, location = ROUTES.get(self.path, (200, None))
+        if self.path == "/soon-gone" and "gone" in ROUTES:
+            status = 404
+        body = BODY if status == 200 else b""
+        if self.path == "/stall":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:10])
+            self.wfile.flush()
+            time.sleep(1)  # Well past the check's READ_TIMEOUT
+            return
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def fetch(cache, url):
+    """GET url through a fresh pool; return (body, status, requests, connections)."""
+    del requested[:], connections[:]
+    pool = ConnectionPool(url_cache=cache)
+    response = await pool.get(url)
+    body = b""
+    buf = bytearray(256)
+    while True:
+        n = await response.readinto(buf)
+        if not n:
+            break
+        body += buf[:n]
+    response.close()
+    pool.close()
+    return body, response.status_code, list(requested), len(connections)
+
+
+async def check_cache(workdir, port):
+    filename = os.path.join(workdir, "urls.json")
+    base = f"localhost:{port}"  # No scheme, like some entries in rss_feeds
+
+    cnn = "rss.cnn.com/rss/edition.rss"
+    check("a URL without a scheme is http", normalize_url(cnn) == "http://" + cnn)
+    check("default ports are dropped", normalize_url("https://Example.com:443/feed") == "https://example.com/feed")
+    check("other ports are kept", normalize_url("http://example.com:8080") == "http://example.com:8080/")
+
+    cache = UrlCache(filename)
+    url = normalize_url(base + "/hop")
+    body, status, paths, _ = await fetch(cache, url)
+    check("a redirect chain is followed", body == BODY and paths == ["/hop", "/old", "/feed.xml"])
+    cache.save()
+
+    cache = UrlCache(filename)  # As after a restart
+    check("the redirect survives a restart", cache.resolve(url) == f"http://localhost:{port}/feed.xml")
+    check("the host's address is remembered", cache.addresses.get("localhost", [None])[0] == "127.0.0.1")
+    body, status, paths, opened = await fetch(cache, url)
+    check("a repeat fetch goes straight to the feed", body == BODY and paths == ["/feed.xml"] and opened == 1)
+
+    url = normalize_url(base + "/temp")
+    await fetch(cache, url)
+    body, status, paths, _ = await fetch(cache, url)
+    check("temporary redirects are followed each time", paths == ["/temp", "/feed.xml"])
+
+    url = normalize_url(base + "/old")
+    await fetch(cache, url)
+    cache.redirects[url][1] = 0
+    body, status, paths, _ = await fetch(cache, url)
+    check("an expired redirect is asked again", paths == ["/old", "/feed.xml"])
+
+    url = normalize_url(base + "/moved")
+    await fetch(cache, url)
+    ROUTES["gone"] = None
+    ROUTES["/moved"] = (301, "/feed.xml")
+    body, status, paths, _ = await fetch(cache, url)
+    check(
+        "a redirect to a page that has gone is forgotten",
+        body == BODY
+        and paths == ["/soon-gone", "/moved", "/feed.xml"]
+        and cache.resolve(url).endswith("/feed.xml"),
+    )
+
+    cache.addresses["localhost"] = ["127.0.0.2", cache.addresses["localhost"][1]]  # Nothing listens there
+    url = normalize_url(base + "/plain")
+    try:
+        await fetch(cache, url)
+        refused = False
+    except OSError:
+        refused = True
+    body, status, paths, _ = await fetch(cache, url)
+    check("an address that refuses is looked up again", refused and body == BODY)
+
+    timeout = http_pool.READ_TIMEOUT
+    http_pool.READ_TIMEOUT = 0.2
+    pool = ConnectionPool()
+    response = await pool.get(normalize_url(base + "/stall"))
+    try:
+        while await response.readinto(bytearray(256)):
+            pass
+        stalled = False
+    except OSError:
+        stalled = True
+    response.close()
+    http_pool.READ_TIMEOUT = timeout
+    check("a stalled read times out and frees its connection", stalled and pool.open == 0)
+
+    cache.addresses["localhost"][1] = 0
+    cache.save()
+    check("expired entries are not saved", "localhost" not in UrlCache(filename).addresses)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.handle_error = lambda request, address: None  # Pooled connections closed at the end
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        uasyncio.run(check_cache(workdir, server.server_address[1]))
+    server.shutdown()
+    finish()
+
+
+if __name__ == "__main__":
+    main()
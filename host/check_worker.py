@@ -0,0 +1,149 @@
+"""Check the second-core parse worker with CPython threads standing in for the cores.
+
+Every corpus feed is prefetched once parsing between steps and once through a
+ParseWorker thread, and both must store the same items. The item ring is
+stressed with a producer and consumer racing on a tiny ring, a feed dropped
+while the worker has it must not disturb the next one, and the longest step()
+on the render side is reported for both ways. Only the render thread may open
+files, as littlefs has no locking. CPython's lock between threads
+hides most of the gain, which shows on the device:
+
+    python host/check_worker.py
+"""
+import builtins
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+from checks import check, download, finish, quiet  # noqa: E402
+from corpus import corpus  # noqa: E402
+from feed_fetch import Prefetch  # noqa: E402
+from item_store import ItemStore  # noqa: E402
+from parse_worker import ItemRing, ParseWorker  # noqa: E402
+from seen_index import SeenIndex, item_key  # noqa: E402
+from feed_parser import parse_rss_data_from_file  # noqa: E402
+
+TIMEOUT = 30  # Seconds before a job that never finishes counts as a failure
+
+worker_opens = []  # Files opened off the main thread
+
+
+def watched_open(file, *args, **kwargs):
+    if threading.current_thread() is not threading.main_thread():
+        worker_opens.append(file)
+    return real_open(file, *args, **kwargs)
+
+
+real_open = builtins.open
+
+
+def check_ring():
+    """A producer and a consumer thread racing on a three-slot ring lose and reorder nothing."""
+    ring = ItemRing(3)
+    count = 20000
+    received = []
+
+    def produce():
+        for i in range(count):
+            while not ring.put(i):
+                time.sleep(0)
+            if random.random() < 0.01:
+                time.sleep(0.0001)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    deadline = time.time() + TIMEOUT
+    while len(received) < count and time.time() < deadline:
+        entry = ring.get()
+        if entry is None:
+            time.sleep(0)
+        else:
+            received.append(entry)
+    producer.join()
+    check("the ring hands over every entry in order", received == list(range(count)))
+    check("the ring is empty afterwards", ring.get() is None and ring.count == 0)
+
+
+def run(job, routes):
+    """Download a job, then step it to the end like refresh_feeds; return the longest step in ms."""
+    download(job, routes)
+    longest = 0
+    deadline = time.time() + TIMEOUT
+    while not job.done and time.time() < deadline:
+        started = time.perf_counter()
+        job.step(blocking=True)
+        longest = max(longest, time.perf_counter() - started)
+        time.sleep(0)  # Give the worker a turn, as frames would
+    return longest * 1000
+
+
+def stored(store, feed):
+    items = store.items(feed)
+    records = list(items)
+    items.close()
+    return records
+
+
+def main():
+    random.seed(1)
+    check_ring()
+
+    worker = ParseWorker()
+    check("the worker starts", worker.start())
+    builtins.open = watched_open
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = ItemStore(os.path.join(workdir, "store"), budget=10 * 1024 * 1024)
+        seen = SeenIndex(os.path.join(workdir, "seen.bin"))
+        same = True
+        slowest = {"between steps": 0, "worker": 0}
+        with quiet():  # Fetch progress
+            for name, url, fmt, path in corpus():
+                # Every other story has been seen, so its description is dropped
+                for i, (title, description, link, date) in enumerate(parse_rss_data_from_file(path)):
+                    if i % 2:
+                        seen.add(item_key(title, link))
+                results = []
+                for way, job_worker in (("between steps", None), ("worker", worker)):
+                    feed = f"{name}-{fmt}-{way}"
+                    filename = os.path.join(workdir, f"{name}.xml")
+                    job = Prefetch(feed, url, store, filename, seen, worker=job_worker)
+                    slowest[way] = max(slowest[way], run(job, {url: path}))
+                    results.append((job.count, job.new, stored(store, feed)))
+                    same = same and not os.path.exists(filename)
+                same = same and results[0] == results[1] and results[0][0] > 0
+        check("the worker stores the same items and removes the download", same)
+
+        # A feed dropped while the worker parses it leaves the next one alone
+        name, url, fmt, path = corpus()[0]
+        with quiet():
+            dropped = Prefetch("dropped", url, store, os.path.join(workdir, "a.xml"), worker=worker)
+            download(dropped, {url: path})
+            while not dropped._parsing and not dropped.done:
+                dropped.step(blocking=True)
+            dropped.discard()
+            job = Prefetch("after", url, store, os.path.join(workdir, "b.xml"), worker=worker)
+            run(job, {url: path})
+        check(
+            "a dropped feed stores nothing and the next is unaffected",
+            not store.has("dropped") and job.count > 0 and not dropped._parsing,
+        )
+        removed = not os.path.exists(os.path.join(workdir, "a.xml"))
+        check("the dropped feed's download is removed", removed)
+        builtins.open = real_open
+        check("the worker leaves flash to the render core", not worker_opens)
+
+    for way, ms in slowest.items():
+        print(f"longest step {way}: {ms:.2f}ms")
+    finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Shared by the host check scripts: recording each check, exiting with the result,
+silencing the app's progress messages and serving canned feeds to fetch jobs."""
+import io
+import os
+import sys
+from contextlib import contextmanager
+
+import uasyncio
+
+failures = []  # Names of the checks that failed
+
+
+def check(name, ok):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def finish():
+    """Print the number of failures and exit non-zero if there were any."""
+    print(f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+@contextmanager
+def quiet():
+    """Discard what is printed inside the with block."""
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+class CannedResponse:
+    """A pooled response whose body is served from memory."""
+
+    def __init__(self, body, status_code=200, headers=None):
+        self.body = io.BytesIO(body)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    async def readinto(self, buf):
+        return self.body.readinto(buf)
+
+    async def drain(self, buf):
+        pass
+
+    def close(self):
+        self.body.close()
+
+
+class CannedPool:
+    """Stands in for ConnectionPool, answering from routes: url -> body bytes or a file's path."""
+
+    def __init__(self, routes):
+        self.routes = routes
+
+    async def get(self, url, headers=None):
+        body = self.routes.get(url)
+        if body is None:
+            raise OSError(f"-2: no canned response for {url}")
+        if isinstance(body, str):
+            with open(body, "rb") as f:
+                body = f.read()
+        return CannedResponse(body)
+
+
+def download(job, routes):
+    """Run a fetch job's download() against routes, as start_fetch's task does."""
+    uasyncio.run(job.download(CannedPool(routes)))
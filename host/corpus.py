@@ -0,0 +1,181 @@
+"""Feed fixtures for the host benchmarks: one RSS and one Atom document per feed.
+
+Every feed named in rss_display.py is covered, including the commented-out ones.
+Documents recorded with `python host/corpus.py --record` are used as the native
+format of their feed when present. Otherwise a deterministic stand-in is generated
+from the sample descriptions, sized like the real feed.
+"""
+import os
+import random
+import re
+import sys
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HOST)
+FIXTURES = os.path.join(HOST, "fixtures")
+FEEDS_DIR = os.path.join(FIXTURES, "feeds")  # Generated and recorded documents, not committed
+RECORDED_DIR = os.path.join(FEEDS_DIR, "recorded")
+
+# Rough size in KB, item count and native format of each feed, as seen when browsing them
+FEED_PROFILES = {
+    "BBC": (40, 50, "rss"),
+    "CNN": (60, 50, "rss"),
+    "HuffPost": (80, 25, "rss"),
+    "HuffPostUS": (80, 25, "rss"),
+    "ArsTechnica": (200, 20, "rss"),
+    "Engadget": (250, 50, "rss"),
+    "Gizmodo": (300, 20, "rss"),
+    "Lifehacker": (250, 20, "rss"),
+    "Mashable": (150, 30, "rss"),
+    "TechCrunch": (120, 20, "rss"),
+    "The Verge": (350, 10, "atom"),
+    "WIRED": (200, 50, "rss"),
+    "NASA": (30, 10, "rss"),
+    "SciAmerica": (60, 30, "rss"),
+    "Billboard": (150, 30, "rss"),
+    "RollinStone": (120, 25, "rss"),
+    "FoolWatch": (100, 30, "rss"),
+    "Forbes": (150, 30, "rss"),
+    "HBR": (300, 25, "rss"),
+    "Buzzfeed": (200, 100, "rss"),
+    "ESPN": (40, 20, "rss"),
+    "FeedBurner": (100, 15, "rss"),
+    "LinusTech": (50, 25, "rss"),
+}
+DEFAULT_PROFILE = (80, 25, "rss")
+
+TITLE_WORDS = (
+    "Markets rally as officials signal pause on rate rises",
+    "Scientists spot water vapour around distant exoplanet",
+    "The best laptops we’ve tested this year",
+    "Storm forces thousands to evacuate coastal towns",
+    "Review: a phone that’s almost perfect",
+    "Chart-topping band announces surprise reunion tour",
+    "How to make crispy roasted potatoes &amp; gravy",
+    "Why managers should give feedback early",
+    "Quarterback throws for 400 yards in comeback win",
+    "We tested the new GPUs &#8211; here’s what we found",
+)
+
+FEED_LINE = re.compile(r'^\s*#?\s*"([^"]+)":\s*"([^"]+)",', re.M)
+
+
+def feed_urls():
+    """Return (name, url) for every feed in rss_display.py, commented out or not."""
+    with open(os.path.join(ROOT, "rss_display.py"), encoding="utf-8") as f:
+        source = f.read()
+    start = source.index("rss_feeds = {")
+    end = source.index("\n}", start)
+    return FEED_LINE.findall(source[start:end])
+
+
+def slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name)
+
+
+def load_descriptions():
+    with open(os.path.join(FIXTURES, "descriptions.txt"), encoding="utf-8") as f:
+        return [d.strip("\n") for d in f.read().split("\n---\n")]
+
+
+def escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def generate(name, fmt):
+    """Build a stand-in document for a feed, sized like its profile."""
+    size_kb, count, _ = FEED_PROFILES.get(name, DEFAULT_PROFILE)
+    rng = random.Random(f"{name}/{fmt}")
+    samples = load_descriptions()[:-1]  # The last sample is deliberately broken markup
+    per_item = size_kb * 1024 // count
+    items = []
+    for i in range(count):
+        title = f"{rng.choice(TITLE_WORDS)} ({name} {i + 1})"
+        description = rng.choice(samples)
+        body = []
+        while sum(len(b) for b in body) < per_item * 2 // 3:
+            body.append("<p>" + rng.choice(samples) + "</p>")
+        body = "".join(body)
+        link = f"https://example.com/{slug(name).lower()}/{i + 1}"
+        date = f"Mon, {1 + i % 28:02d} Oct 2023 {i % 24:02d}:{i * 7 % 60:02d}:00 +0000"
+        if fmt == "rss":
+            items.append(
+                "<item>\n"
+                f"<title>{title}</title>\n"
+                f"<link>{link}</link>\n"
+                f'<guid isPermaLink="false">{link}</guid>\n'
+                f"<pubDate>{date}</pubDate>\n"
+                f"<description>{description}</description>\n"
+                f"<content:encoded><![CDATA[{body}]]></content:encoded>\n"
+                "</item>\n"
+            )
+        else:
+            items.append(
+                "<entry>\n"
+                f'<title type="html">{title}</title>\n'
+                f'<link rel="alternate" type="text/html" href="{link}" />\n'
+                f"<id>{link}</id>\n"
+                f"<updated>2023-10-{1 + i % 28:02d}T{i % 24:02d}:{i * 7 % 60:02d}:00Z</updated>\n"
+                f'<summary type="html">{escape(description)}</summary>\n'
+                f'<content type="html">{escape(body)}</content>\n'
+                "</entry>\n"
+            )
+    if fmt == "rss":
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">\n'
+            f"<channel>\n<title>{name}</title>\n<link>https://example.com/</link>\n"
+            + "".join(items)
+            + "</channel>\n</rss>\n"
+        ).encode()
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="en">\n'
+        f"<title>{name}</title>\n<id>https://example.com/</id>\n"
+        + "".join(items)
+        + "</feed>\n"
+    ).encode()
+
+
+def corpus():
+    """Return a list of (name, url, format, path) covering every feed in both formats."""
+    os.makedirs(FEEDS_DIR, exist_ok=True)
+    documents = []
+    for name, url in feed_urls():
+        native = FEED_PROFILES.get(name, DEFAULT_PROFILE)[2]
+        for fmt in ("rss", "atom"):
+            recorded = os.path.join(RECORDED_DIR, slug(name) + ".xml")
+            if fmt == native and os.path.exists(recorded):
+                documents.append((name, url, fmt, recorded))
+                continue
+            path = os.path.join(FEEDS_DIR, f"{slug(name)}.{fmt}.xml")
+            if not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(generate(name, fmt))
+            documents.append((name, url, fmt, path))
+    return documents
+
+
+def record():
+    """Download every feed into fixtures/feeds/recorded (needs network access)."""
+    import urllib.request
+
+    os.makedirs(RECORDED_DIR, exist_ok=True)
+    for name, url in feed_urls():
+        full_url = url if "://" in url else "http://" + url
+        try:
+            with urllib.request.urlopen(full_url, timeout=20) as response:
+                body = response.read()
+        except OSError as e:
+            print(f"{name}: {e}")
+            continue
+        with open(os.path.join(RECORDED_DIR, slug(name) + ".xml"), "wb") as f:
+            f.write(body)
+        print(f"{name}: {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        record()
+    for name, url, fmt, path in corpus():
+        print(f"{name:<12}{fmt:<6}{os.path.getsize(path):>9}  {path}")
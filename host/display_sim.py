@@ -0,0 +1,261 @@
+"""Run rss_display's rendering on a PC and check every frame against golden frames.
+
+The picographics and galactic stand-ins in host/standins draw into a 53x11
+framebuffer and record each frame pushed by gu.update, with its draw calls and
+render time, and frames skipped as unchanged by frame_push are counted. Each
+scenario below drives the real display_text, scroll_text, outline_text and
+check_buttons code. The frame ticker runs on a virtual clock that advances one
+period per frame, so scrolls are the same on every run:
+
+    python host/display_sim.py [--update] [--show] [--png DIR] [scenario ...]
+
+Frames are compared by hash with host/golden_frames.json, and the first frame
+that differs is printed. --update rewrites the golden frames, --show prints every
+frame as text and --png writes them as images. Render times are CPython's, so
+only compare them with each other, not with the device.
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+HOST = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HOST, "standins"))
+sys.path.insert(0, os.path.dirname(HOST))
+
+import frame_ticker  # noqa: E402
+import text_strip  # noqa: E402
+import uasyncio  # noqa: E402
+from galactic import GalacticUnicorn  # noqa: E402
+
+GOLDEN = os.path.join(HOST, "golden_frames.json")
+PNG_SCALE = 8  # Pixels per LED in dumped images
+
+HEADLINE = "Pico W shows the news: 53 x 11 LEDs"
+
+
+def load_app(workdir):
+    """Import rss_display without starting its main loop, keeping its files in workdir."""
+    os.chdir(workdir)
+    run = uasyncio.run
+    uasyncio.run = lambda main: main.close()
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        import rss_display
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        uasyncio.run = run
+    rss_display.HOLD_TIME = 0
+    return rss_display
+
+
+def virtual_clock(app):
+    """Drive the frame ticker from frames, pushed or skipped, instead of the wall clock."""
+    clock = [0]
+    frame_ticker.ticks_ms = lambda: clock[0]
+    push = app.frame_pusher.push
+    period = int(app.STEP_TIME * 1000)
+
+    def timed_push():
+        pushed = push()
+        if not pushed:
+            app.display.frame_started = None  # Render times are of pushed frames only
+        clock[0] += period
+        return pushed
+
+    app.frame_pusher.push = timed_push
+
+
+def source_style(app):
+    return {
+        "outline": app.source_outline,
+        "font_name": app.source_font_name,
+        "text_color": app.source_text_color,
+        "outline_color": app.source_outline_color,
+        "bg_color": app.source_bg_color,
+    }
+
+
+def message(app):
+    app.display_text("Hello")
+
+
+def source(app):
+    app.display_text(app.feeds[0].name, **source_style(app))
+
+
+def scroll(app):
+    uasyncio.run(app.scroll_text(HEADLINE))
+
+
+def scroll_outline(app):
+    uasyncio.run(app.scroll_text(HEADLINE, outline=True))
+
+
+def scroll_outline_unbuffered(app):
+    # Without framebuffer access the whole outlined string is drawn nine times a frame
+    framebuffer = text_strip.framebuffer
+    text_strip.framebuffer = lambda display: None
+    app.glyph_atlas.fonts, app.glyph_atlas.recent = {}, []
+    try:
+        uasyncio.run(app.scroll_text(HEADLINE, outline=True))
+    finally:
+        text_strip.framebuffer = framebuffer
+        app.glyph_atlas.fonts, app.glyph_atlas.recent = {}, []
+
+
+def buttons(app):
+    # Lux + held for five polls, then Vol + pressed once
+    app.gu.press(GalacticUnicorn.SWITCH_BRIGHTNESS_UP, updates=5)
+    for poll in range(10):
+        if poll == 7:
+            app.gu.press(GalacticUnicorn.SWITCH_VOLUME_UP)  # Updates stop once frames repeat
+        app.check_buttons()
+        app.display_text(app.feeds[app.current_source_index].name, **source_style(app))
+
+
+SCENARIOS = {
+    "message": message,
+    "source": source,
+    "scroll": scroll,
+    "scroll_outline": scroll_outline,
+    "scroll_outline_unbuffered": scroll_outline_unbuffered,
+    "buttons": buttons,
+}
+
+
+def record(app, scenario):
+    """Run a scenario from a blank display. Returns its frames and the number skipped."""
+    gu = app.gu
+    gu.brightness = 0.5
+    gu.presses = []
+    gu.frames = []
+    app.current_source_index = 0
+    app.source_switched = False
+    skipped = app.frame_pusher.skipped
+    app.frame_pusher.checksum = None  # The first frame is always pushed
+    gu.record = True
+    try:
+        scenario(app)
+    finally:
+        gu.record = False
+    return gu.frames, app.frame_pusher.skipped - skipped
+
+
+def frame_hash(frame):
+    return format(zlib.crc32(frame.pixels + f"{frame.brightness:.4f}".encode()), "08x")
+
+
+def frame_text(frame):
+    """The frame as text, one character per LED by brightness."""
+    lines = []
+    for y in range(GalacticUnicorn.HEIGHT):
+        line = ""
+        for x in range(GalacticUnicorn.WIDTH):
+            offset = (y * GalacticUnicorn.WIDTH + x) * 3
+            level = max(frame.pixels[offset : offset + 3])
+            line += " " if level < 16 else "." if level < 96 else "+" if level < 192 else "#"
+        lines.append("|" + line + "|")
+    return "\n".join(lines)
+
+
+def write_png(path, frame, scale=PNG_SCALE):
+    """Write the frame as an RGB PNG, each LED a scale x scale square."""
+    width, height = GalacticUnicorn.WIDTH, GalacticUnicorn.HEIGHT
+    rows = b""
+    for y in range(height):
+        row = b"\x00"  # No filter
+        for x in range(width):
+            offset = (y * width + x) * 3
+            row += frame.pixels[offset : offset + 3] * scale
+        rows += row * scale
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width * scale, height * scale, 8, 2, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+def summarize(name, frames, skipped):
+    render_ms = [frame.render_s * 1000 for frame in frames]
+    calls = {}
+    for frame in frames:
+        for call, n in frame.calls.items():
+            calls[call] = calls.get(call, 0) + n
+    per_frame = sum(calls.values()) / len(frames) if frames else 0
+    breakdown = ", ".join(f"{call} {n / len(frames):.0f}" for call, n in sorted(calls.items()))
+    print(
+        f"{name:<26}{len(frames):>7}{skipped:>8}{sum(render_ms) / max(1, len(frames)):>9.3f}"
+        f"{max(render_ms, default=0):>9.3f}{per_frame:>9.0f}   {breakdown}"
+    )
+
+
+def compare(name, frames, golden):
+    """Return a description of how the frames differ from the golden ones, or None."""
+    expected = golden.get(name)
+    if expected is None:
+        return "no golden frames"
+    hashes = [frame_hash(frame) for frame in frames]
+    for i, (actual, wanted) in enumerate(zip(hashes, expected)):
+        if actual != wanted:
+            return f"frame {i} differs:\n{frame_text(frames[i])}"
+    if len(hashes) != len(expected):
+        return f"{len(hashes)} frames, expected {len(expected)}"
+    return None
+
+
+def main():
+    names = [arg for arg in sys.argv[1:] if arg in SCENARIOS] or list(SCENARIOS)
+    png_dir = None
+    if "--png" in sys.argv:
+        png_dir = os.path.abspath(sys.argv[sys.argv.index("--png") + 1])
+        os.makedirs(png_dir, exist_ok=True)
+    try:
+        with open(GOLDEN) as f:
+            golden = json.load(f)
+    except OSError:
+        golden = {}
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        app = load_app(workdir)
+        virtual_clock(app)
+        print(f"{'scenario':<26}{'frames':>7}{'skipped':>8}{'mean ms':>9}{'max ms':>9}{'calls':>9}   calls per frame")
+        for name in names:
+            frames, skipped = record(app, SCENARIOS[name])
+            summarize(name, frames, skipped)
+            if "--show" in sys.argv:
+                for i, frame in enumerate(frames):
+                    print(f"{name} frame {i}, brightness {frame.brightness:.4f}")
+                    print(frame_text(frame))
+            if png_dir:
+                for i, frame in enumerate(frames):
+                    write_png(os.path.join(png_dir, f"{name}_{i:04d}.png"), frame)
+            if "--update" in sys.argv:
+                golden[name] = [frame_hash(frame) for frame in frames]
+                continue
+            difference = compare(name, frames, golden)
+            if difference:
+                failures.append(name)
+                print(f"FAIL {name}: {difference}")
+        os.chdir(cwd)
+
+    if "--update" in sys.argv:
+        with open(GOLDEN, "w") as f:
+            json.dump(golden, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Golden frames written to {GOLDEN}")
+    elif failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""cleanup_text before the single-scan tag stripper, kept to check the new one against."""
+import re
+
+# str.isascii lets CPython skip straight to the next '&' in plain ASCII text.
+# MicroPython does not have it, so there every character is inspected once.
+_isascii = getattr(str, "isascii", None)
+
+# Longest entity name we try to decode, e.g. "&#x2014;" or "&hellip;"
+MAX_ENTITY_LENGTH = 10
+
+# Named entities seen in the feeds. Values are folded to drawable glyphs below.
+NAMED_ENTITIES = {
+    "amp": "&",
+    "lt": "<",
+    "gt": ">",
+    "quot": '"',
+    "apos": "'",
+    "nbsp": " ",
+    "hellip": "…",
+    "mdash": "—",
+    "ndash": "–",
+    "lsquo": "‘",
+    "rsquo": "’",
+    "sbquo": "‚",
+    "ldquo": "“",
+    "rdquo": "”",
+    "bdquo": "„",
+    "laquo": "«",
+    "raquo": "»",
+    "bull": "•",
+    "middot": "·",
+    "euro": "€",
+    "pound": "£",
+    "yen": "¥",
+    "cent": "¢",
+    "copy": "©",
+    "reg": "®",
+    "trade": "™",
+    "deg": "°",
+    "times": "×",
+    "divide": "÷",
+    "aacute": "á",
+    "agrave": "à",
+    "acirc": "â",
+    "auml": "ä",
+    "eacute": "é",
+    "egrave": "è",
+    "ecirc": "ê",
+    "euml": "ë",
+    "iacute": "í",
+    "iuml": "ï",
+    "ntilde": "ñ",
+    "oacute": "ó",
+    "ouml": "ö",
+    "uacute": "ú",
+    "uuml": "ü",
+    "ccedil": "ç",
+    "szlig": "ß",
+}
+
+# Characters bitmap8 has no glyph for, mapped to ones it can draw.
+# Printable ASCII is drawn as-is, and accented Latin-1 letters (U+00C0 to U+00FF)
+# are drawn by PicoGraphics as a base letter plus accent. Anything else is dropped.
+GLYPH_FOLDS = {
+    "\u00a0": " ",  # No-break space
+    "\u2002": " ",  # En space
+    "\u2003": " ",  # Em space
+    "\u2009": " ",  # Thin space
+    "\u202f": " ",  # Narrow no-break space
+    "\u200b": "",  # Zero-width space
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "‛": "'",
+    "′": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "″": '"',
+    "«": '"',
+    "»": '"',
+    "‐": "-",
+    "‑": "-",
+    "‒": "-",
+    "–": "-",
+    "—": "-",
+    "―": "-",
+    "−": "-",
+    "…": "...",
+    "•": "*",
+    "·": "*",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "¢": "c",
+    "©": "(c)",
+    "®": "(R)",
+    "™": "TM",
+    "°": "o",
+    "×": "x",
+    "÷": "/",
+}
+
+
+def cleanup_text(text):
+    # Remove CDATA sections
+    text = remove_cdata(text)
+
+    # Replace HTML entities and fold characters the font cannot draw
+    text = replace_html_entities(text)
+
+    # Remove HTML tags
+    text = remove_html_tags(text)
+
+    # Clean up whitespace
+    text = clean_whitespace(text)
+
+    return text
+
+
+def remove_cdata(text):
+    cdata_pattern = r"<!\[CDATA\[(.*?)\]\]>"
+    return re.sub(cdata_pattern, r"\1", text)
+
+
+def fold_glyph(char):
+    """Return the drawable replacement for a single character."""
+    code = ord(char)
+    if 32 <= code < 127 or char in "\n\r\t":
+        return char
+    folded = GLYPH_FOLDS.get(char)
+    if folded is not None:
+        return folded
+    if 0xC0 <= code <= 0xFF:
+        return char
+    return ""
+
+
+def decode_entity(text, start):
+    """Decode the entity whose name begins at start (just after the '&').
+
+    Returns (replacement, index after the ';'), or None if it is not an entity we know.
+    Double-encoded entities such as "&amp;nbsp;" decode in one step.
+    """
+    end = text.find(";", start, start + MAX_ENTITY_LENGTH + 1)
+    if end == -1:
+        return None
+    name = text[start:end]
+    if not name:
+        return None
+
+    if name[0] == "#":
+        try:
+            if name[1:2] in ("x", "X"):
+                char = chr(int(name[2:], 16))
+            else:
+                char = chr(int(name[1:]))
+        except (ValueError, OverflowError):
+            return None
+    else:
+        char = NAMED_ENTITIES.get(name)
+        if char is None:
+            return None
+
+    if char == "&":
+        # "&amp;mdash;" and friends: decode the entity that follows as well
+        nested = decode_entity(text, end + 1)
+        if nested is not None:
+            return nested
+    return char, end + 1
+
+
+def replace_html_entities(text):
+    """Decode HTML entities and fold non-ASCII characters in one pass over the text."""
+    out = []
+    run_start = 0  # Start of the current run of characters that pass through unchanged
+    i = 0
+    length = len(text)
+    ascii_only = _isascii is not None and _isascii(text)
+
+    while i < length:
+        if ascii_only:
+            i = text.find("&", i)
+            if i == -1:
+                break
+        char = text[i]
+        if char == "&":
+            decoded = decode_entity(text, i + 1)
+            if decoded is None:
+                i += 1
+                continue
+            out.append(text[run_start:i])
+            char, i = decoded
+            if char == "<":
+                # Encoded markup like "&lt;p&gt;" is dropped entirely
+                close = text.find("&gt;", i)
+                if close != -1:
+                    i = close + 4
+                    run_start = i
+                    continue
+            out.append(fold_glyph(char))
+            run_start = i
+        elif ord(char) > 126:
+            out.append(text[run_start:i])
+            out.append(fold_glyph(char))
+            i += 1
+            run_start = i
+        else:
+            i += 1
+
+    if not out:
+        return text
+    out.append(text[run_start:])
+    return "".join(out)
+
+
+def remove_html_tags(text):
+    """Remove HTML tags and incomplete tags from a given text."""
+    while "<" in text and ">" in text:
+        start = text.find("<")
+        end = text.find(">")
+        if start < end:
+            text = text[:start] + text[end + 1 :]
+        else:
+            break
+
+    # Remove incomplete HTML tags
+    text = re.sub(r"<[^>]*$", "", text)
+
+    return text
+
+
+def clean_whitespace(text):
+    """Remove excessive whitespace from a given text."""
+    text = re.sub(
+        r"\s+", " ", text
+    )  # Replace multiple spaces, newlines, and tabs with a single space
+    return text.strip()  # Remove leading and trailing whitespace
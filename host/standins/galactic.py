@@ -0,0 +1,99 @@
+"""Stand-in for the Galactic Unicorn driver.
+
+update() records each frame pushed to the LEDs: a copy of the framebuffer, the
+brightness, the draw calls made since the last update and how long they took.
+Buttons are pressed by script, counted in updates, and Vol presses also fire
+the interrupt of the machine stand-in's pin, as the real switches would.
+"""
+import time
+
+try:
+    import machine
+except ImportError:
+    machine = None
+
+
+class Frame:
+    def __init__(self, pixels, brightness, calls, render_s):
+        self.pixels = pixels  # RGB bytes, row by row
+        self.brightness = brightness
+        self.calls = calls  # Draw call name -> count for this frame
+        self.render_s = render_s  # From the first draw call to update()
+
+
+class GalacticUnicorn:
+    WIDTH = 53
+    HEIGHT = 11
+
+    SWITCH_A = 0
+    SWITCH_B = 1
+    SWITCH_C = 3
+    SWITCH_D = 6
+    SWITCH_SLEEP = 27
+    SWITCH_VOLUME_UP = 7
+    SWITCH_VOLUME_DOWN = 8
+    SWITCH_BRIGHTNESS_UP = 21
+    SWITCH_BRIGHTNESS_DOWN = 26
+
+    def __init__(self):
+        self.brightness = 0.5
+        self.updates = 0
+        self.frames = []  # Frames pushed while record is set
+        self.record = False
+        self.presses = []  # Scripted (switch, first update, last update)
+        self.last_calls = {}
+
+    def set_brightness(self, value):
+        self.brightness = min(1.0, max(0.0, value))
+
+    def get_brightness(self):
+        return self.brightness
+
+    def adjust_brightness(self, delta):
+        self.set_brightness(self.brightness + delta)
+
+    def press(self, switch, after=0, updates=1):
+        """Test helper: hold a switch down for a number of updates, starting after some."""
+        first = self.updates + after
+        self.presses.append((switch, first, first + updates - 1))
+        if not after:
+            self.pin_edge(switch, True)
+
+    def is_pressed(self, switch):
+        for pressed, first, last in self.presses:
+            if pressed == switch and first <= self.updates <= last:
+                return True
+        return False
+
+    def pin_edge(self, switch, down):
+        if machine is None or switch not in (self.SWITCH_VOLUME_UP, self.SWITCH_VOLUME_DOWN):
+            return
+        pin = machine.Pin(switch)
+        if down:
+            pin.press()
+        else:
+            pin.release()
+
+    def update(self, graphics):
+        now = time.perf_counter()
+        self.updates += 1
+        calls = getattr(graphics, "calls", {})
+        if self.record:
+            started = getattr(graphics, "frame_started", None)
+            self.frames.append(
+                Frame(
+                    bytes(graphics),
+                    self.brightness,
+                    {name: n - self.last_calls.get(name, 0) for name, n in calls.items()},
+                    now - started if started is not None else 0,
+                )
+            )
+        self.last_calls = dict(calls)
+        if hasattr(graphics, "frame_started"):
+            graphics.frame_started = None
+        # Switches whose scripted press starts or ends here change state
+        for switch, first, last in self.presses:
+            if first == self.updates:
+                self.pin_edge(switch, True)
+            elif last + 1 == self.updates:
+                self.pin_edge(switch, False)
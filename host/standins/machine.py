@@ -0,0 +1,50 @@
+"""Stand-in for MicroPython's machine module, with pins whose interrupts can be fired by hand."""
+
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x37\x2a\x2b"
+
+
+def freq(hz=None):
+    return 125000000
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    _pins = {}
+
+    def __new__(cls, number, *args, **kw):
+        # Like the real module, each pin is a single shared object
+        if number not in cls._pins:
+            pin = object.__new__(cls)
+            pin._number = number
+            pin._value = 1
+            pin._handler = None
+            cls._pins[number] = pin
+        return cls._pins[number]
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+    def irq(self, handler=None, trigger=IRQ_FALLING, hard=False):
+        self._handler = handler
+
+    def press(self):
+        """Test helper: pull the pin low and fire its interrupt."""
+        self._value = 0
+        if self._handler:
+            self._handler(self)
+
+    def release(self):
+        """Test helper: let the pin go high and fire its interrupt."""
+        self._value = 1
+        if self._handler:
+            self._handler(self)
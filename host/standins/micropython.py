@@ -0,0 +1,5 @@
+"""Stand-in for MicroPython's micropython module: native functions run as plain Python."""
+
+
+def native(func):
+    return func
@@ -0,0 +1,99 @@
+"""Stand-in for MicroPython's network module.
+
+A WLAN joins any network at once, unless access points are registered in
+access_points, in which case the SSID and password must match one of them.
+Tests can set join_delay to slow joins down and call drop() to lose the link.
+"""
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+access_points = []  # (ssid, password, bssid, channel, rssi) to check joins against
+join_delay = 0  # Calls to status() before a join completes
+
+
+class WLAN:
+    _interfaces = {}
+
+    def __new__(cls, interface=STA_IF):
+        # Like the real module, each interface is a single shared object
+        if interface not in cls._interfaces:
+            wlan = object.__new__(cls)
+            wlan._interface = interface
+            wlan._active = False
+            wlan._status = STAT_IDLE
+            wlan._target = STAT_IDLE
+            wlan._pending = 0
+            wlan._joins = 0  # connect() calls, for tests
+            wlan._scans = 0  # scan() calls, which block on the device
+            wlan._config = {"ssid": "", "channel": 1, "mac": b"\x28\xcd\xc1\x00\x00\x01"}
+            cls._interfaces[interface] = wlan
+        return cls._interfaces[interface]
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+        if not self._active:
+            self._status = STAT_IDLE
+
+    def connect(self, ssid=None, key=None, bssid=None, **kw):
+        self._config["ssid"] = ssid
+        self._config["bssid"] = bssid
+        self._joins += 1
+        self._pending = join_delay
+        self._status = STAT_CONNECTING
+        self._target = STAT_GOT_IP
+        if access_points:
+            matches = [ap for ap in access_points if ap[0] == ssid and bssid in (None, ap[2])]
+            if not matches:
+                self._target = STAT_NO_AP_FOUND
+            elif matches[0][1] != key:
+                self._target = STAT_WRONG_PASSWORD
+            else:
+                self._config["bssid"] = matches[0][2]  # As joined, when none was asked for
+                self._config["channel"] = matches[0][3]
+        if not self._pending:
+            self._status = self._target
+
+    def drop(self):
+        """Test helper: lose the link, as when the access point goes away."""
+        self._status = STAT_CONNECT_FAIL
+
+    def disconnect(self):
+        self._status = STAT_IDLE
+
+    def isconnected(self):
+        return self._active and self._status == STAT_GOT_IP
+
+    def status(self, param=None):
+        if param == "rssi":
+            return -50
+        if self._status == STAT_CONNECTING:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._status = self._target
+        return self._status
+
+    def config(self, *args, **kw):
+        if kw:
+            self._config.update(kw)
+            return None
+        return self._config.get(args[0])
+
+    def ifconfig(self, config=None):
+        if config is not None:
+            return None
+        if self.isconnected():
+            return ("192.168.1.50", "255.255.255.0", "192.168.1.1", "192.168.1.1")
+        return ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+
+    def scan(self):
+        self._scans += 1
+        return [(ap[0].encode(), ap[2], ap[3], ap[4], 3, False) for ap in access_points]
@@ -0,0 +1,102 @@
+"""Stand-in for PicoGraphics on the Galactic Unicorn, drawing into a 53x11 RGB framebuffer.
+
+Only the calls rss_display uses are implemented. Every font is drawn with the same
+5x8 bitmap glyphs, 6 pixels apart, so frames differ from the device's in letter
+shapes but not in layout. Like the real module, memoryview(graphics) is the
+framebuffer, so the glyph atlas works. Draw calls are counted in calls, and
+frame_started is set by the first draw after each GalacticUnicorn.update.
+"""
+import time
+
+DISPLAY_GALACTIC_UNICORN = 24
+PEN_RGB888 = 7
+
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 8
+
+# Columns of the printable ASCII glyphs, 5 bytes each, bit 0 at the top
+FONT = bytes.fromhex(
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12" "2313086462"
+    "3649562050" "0008070300" "001c224100" "0041221c00" "2a1c7f1c2a" "08083e0808"
+    "0080703000" "0808080808" "0000606000" "2010080402" "3e5149453e" "00427f4000"
+    "7249494946" "2141494d33" "1814127f10" "2745454539" "3c4a494931" "4121110907"
+    "3649494936" "464949291e" "0000140000" "0040340000" "0008142241" "1414141414"
+    "0041221408" "0201590906" "3e415d594e" "7c1211127c" "7f49494936" "3e41414122"
+    "7f4141413e" "7f49494941" "7f09090901" "3e41415173" "7f0808087f" "00417f4100"
+    "2040413f01" "7f08142241" "7f40404040" "7f021c027f" "7f0408107f" "3e4141413e"
+    "7f09090906" "3e4151215e" "7f09192946" "2649494932" "03017f0103" "3f4040403f"
+    "1f2040201f" "3f4038403f" "6314081463" "0304780403" "6159494d43" "007f414141"
+    "0204081020" "004141417f" "0402010204" "4040404040" "0003070800" "2054547840"
+    "7f28444438" "3844444428" "384444287f" "3854545418" "00087e0902" "18a4a49c78"
+    "7f08040478" "00447d4000" "2040403d00" "7f10284400" "00417f4000" "7c04780478"
+    "7c08040478" "3844444438" "fc18242418" "18242418fc" "7c08040408" "4854545424"
+    "04043f4424" "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "4c9090907c"
+    "4464544c44" "0008364100" "0000770000" "0041360800" "0201020402"
+)
+MISSING_GLYPH = bytes.fromhex("7f4141417f")  # Drawn for characters outside ASCII
+
+
+class PicoGraphics(bytearray):
+    def __init__(self, display=DISPLAY_GALACTIC_UNICORN, pen_type=PEN_RGB888):
+        self.width, self.height = 53, 11
+        super().__init__(self.width * self.height * 3)
+        self.font = "bitmap8"
+        self.pen = 0
+        self.calls = {}  # Draw call name -> count since the start
+        self.frame_started = None  # time.perf_counter() of the first draw of this frame
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.frame_started is None:
+            self.frame_started = time.perf_counter()
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def create_pen(self, r, g, b):
+        return (r << 16) | (g << 8) | b
+
+    def set_pen(self, pen):
+        self.pen = pen
+
+    def set_font(self, font):
+        self.font = font
+
+    def rgb(self):
+        pen = self.pen
+        return bytes(((pen >> 16) & 0xFF, (pen >> 8) & 0xFF, pen & 0xFF))
+
+    def clear(self):
+        self.count("clear")
+        self[:] = self.rgb() * (self.width * self.height)
+
+    def pixel(self, x, y):
+        self.count("pixel")
+        if 0 <= x < self.width and 0 <= y < self.height:
+            offset = (y * self.width + x) * 3
+            self[offset : offset + 3] = self.rgb()
+
+    def text(self, text, x, y, wordwrap=-1, scale=1, angle=0, spacing=1):
+        self.count("text")
+        rgb = self.rgb()
+        for char in text:
+            code = ord(char)
+            if 32 <= code < 127:
+                glyph = FONT[(code - 32) * GLYPH_WIDTH : (code - 31) * GLYPH_WIDTH]
+            else:
+                glyph = MISSING_GLYPH
+            for column in range(GLYPH_WIDTH):
+                bits = glyph[column]
+                for row in range(GLYPH_HEIGHT):
+                    if bits >> row & 1:
+                        self.fill(x + column * scale, y + row * scale, scale, rgb)
+            x += (GLYPH_WIDTH + spacing) * scale
+
+    def fill(self, x, y, size, rgb):
+        for py in range(max(0, y), min(self.height, y + size)):
+            for px in range(max(0, x), min(self.width, x + size)):
+                offset = (py * self.width + px) * 3
+                self[offset : offset + 3] = rgb
+
+    def measure_text(self, text, scale=1, spacing=1):
+        return (GLYPH_WIDTH + spacing) * len(text) * scale
@@ -0,0 +1,9 @@
+"""Stand-in for MicroPython's rp2 module."""
+_country = "XX"
+
+
+def country(code=None):
+    global _country
+    if code is None:
+        return _country
+    _country = code
@@ -0,0 +1,7 @@
+"""Stand-in for MicroPython's uasyncio on top of asyncio."""
+from asyncio import *  # noqa: F401,F403
+from asyncio import sleep
+
+
+def sleep_ms(ms):
+    return sleep(ms / 1000)
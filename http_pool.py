@@ -0,0 +1,335 @@
+import time
+import uasyncio
+
+# Connection pool settings
+MAX_CONNECTIONS = 3  # Open sockets at once; each TLS connection costs a lot of heap
+MAX_IDLE_PER_HOST = 1  # Kept-alive connections waiting for the next request to a host
+IDLE_TIMEOUT = 30  # Seconds before an idle connection is closed rather than reused
+MAX_REDIRECTS = 3
+MAX_DRAIN = 4 * 1024  # Unwanted body bytes worth reading to keep a connection for reuse
+READ_TIMEOUT = 20  # Seconds to wait on a stalled server before giving up on the connection
+USER_AGENT = "rss-display"
+
+REDIRECTS = (301, 302, 303, 307, 308)
+PERMANENT_REDIRECTS = (301, 308)
+
+
+def split_url(url):
+    """Return (ssl, host, port, path) for a URL; URLs without a scheme are http."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        scheme, rest = "http", url
+    ssl = scheme == "https"
+    host, sep, path = rest.partition("/")
+    path = "/" + path
+    port = 443 if ssl else 80
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    return ssl, host, port, path
+
+
+def normalize_url(url):
+    """Return url with a scheme, a lower-case host and no default port, so equal URLs match."""
+    ssl, host, port, path = split_url(url.strip())
+    if port != (443 if ssl else 80):
+        host += f":{port}"
+    return ("https://" if ssl else "http://") + host.lower() + path
+
+
+async def timed(awaitable):
+    """Await a socket operation, raising OSError if it takes longer than READ_TIMEOUT."""
+    try:
+        return await uasyncio.wait_for(awaitable, READ_TIMEOUT)
+    except uasyncio.TimeoutError:
+        raise OSError("Timed out")
+
+
+async def read_into(stream, buf):
+    """Fill buf from the stream with what is available, returning the count."""
+    if hasattr(stream, "readinto"):
+        return await stream.readinto(buf)
+    data = await stream.read(len(buf))  # CPython streams have no readinto
+    buf[: len(data)] = data
+    return len(data)
+
+
+class Connection:
+    def __init__(self, key, reader, writer):
+        self.key = key  # (ssl, host, port)
+        self.reader = reader
+        self.writer = writer
+        self.used = time.time()
+        self.reused = False
+
+    def close(self):
+        try:
+            self.writer.close()
+        except OSError:
+            pass
+
+
+class Response:
+    """An HTTP response whose body is read a buffer at a time.
+
+    Closing it after the whole body has been read hands a keep-alive connection
+    back to the pool for the next request to the same host.
+    """
+
+    def __init__(self, pool, connection, status_code, headers):
+        self.pool = pool
+        self.connection = connection
+        self.status_code = status_code
+        self.headers = headers  # Lower-case names
+        self.chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        length = headers.get("content-length")
+        if status_code in (204, 304):
+            self.chunked, length = False, "0"  # Never has a body
+        self.remaining = int(length) if length is not None else None  # None: until closed
+        if self.chunked:
+            self.remaining = 0  # Bytes left in the current chunk
+        self.complete = self.remaining == 0 and not self.chunked
+        self.keep_alive = (
+            headers.get("connection", "").lower() != "close"
+            and (self.chunked or length is not None)
+        )
+
+    async def readinto(self, buf):
+        """Read part of the body into buf. Returns the byte count, 0 at the end."""
+        if self.complete or self.connection is None:
+            return 0
+        reader = self.connection.reader
+        if self.chunked and not self.remaining:
+            size = (await timed(reader.readline())).split(b";")[0].strip()
+            self.remaining = int(size, 16) if size else 0
+            if not self.remaining:
+                # Last chunk: skip any trailers up to the blank line
+                while (await timed(reader.readline())) not in (b"\r\n", b"\n", b""):
+                    pass
+                self.complete = True
+                return 0
+        view = memoryview(buf)
+        if self.remaining is not None and self.remaining < len(buf):
+            view = view[: self.remaining]
+        n = await timed(read_into(reader, view))
+        if not n:
+            if self.remaining is not None:
+                raise OSError("Connection closed mid-body")
+            self.complete = True
+            self.keep_alive = False
+            return 0
+        if self.remaining is not None:
+            self.remaining -= n
+            if not self.remaining:
+                if self.chunked:
+                    await timed(reader.readline())  # The CRLF after each chunk
+                else:
+                    self.complete = True
+        return n
+
+    async def drain(self, buf):
+        """Read and drop the rest of a short body, so the connection can be reused."""
+        if self.remaining is None or self.chunked:
+            return
+        if self.remaining <= MAX_DRAIN:
+            while await self.readinto(buf):
+                pass
+
+    def close(self):
+        if self.connection is None:
+            return
+        if self.complete and self.keep_alive:
+            self.pool.release(self.connection)
+        else:
+            self.pool.discard(self.connection)
+        self.connection = None
+
+
+class ConnectionPool:
+    """Per-host keep-alive connections for uasyncio, so feeds on one host share a handshake.
+
+    With a UrlCache, permanent redirects and host addresses are remembered, so
+    repeat requests skip the redirect chain and the DNS lookup.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, url_cache=None):
+        self.max_connections = max_connections
+        self.url_cache = url_cache
+        self.idle = {}  # (ssl, host, port) -> idle Connections
+        self.open = 0
+        self.freed = uasyncio.Event()  # Set when a connection slot frees up
+        self.tls_by_address = True  # Cleared if the firmware can't name the server for TLS
+
+    async def connect(self, key):
+        connections = self.idle.get(key)
+        while connections:
+            connection = connections.pop()
+            if time.time() - connection.used < IDLE_TIMEOUT:
+                connection.reused = True
+                return connection
+            self.discard(connection)
+        while self.open >= self.max_connections:
+            if not self.close_idle():
+                self.freed.clear()
+                await self.freed.wait()
+        self.open += 1
+        ssl, host, port = key
+        try:
+            reader, writer = await timed(self.open_connection(ssl, host, port))
+        except BaseException:
+            self.open -= 1
+            self.freed.set()
+            raise
+        return Connection(key, reader, writer)
+
+    async def open_connection(self, ssl, host, port):
+        """Connect to the host's cached address if there is one, naming the host for TLS."""
+        cache = self.url_cache
+        if cache is None or (ssl and not self.tls_by_address):
+            return await uasyncio.open_connection(host, port, ssl=ssl or None)
+        address = cache.address(host, port)
+        try:
+            if ssl and address != host:
+                try:
+                    return await uasyncio.open_connection(address, port, ssl=True, server_hostname=host)
+                except TypeError:
+                    self.tls_by_address = False  # Older uasyncio; TLS hosts are looked up each time
+                    return await uasyncio.open_connection(host, port, ssl=True)
+            return await uasyncio.open_connection(address, port, ssl=ssl or None)
+        except OSError:
+            cache.forget_address(host)  # It may have moved; look it up again next time
+            raise
+
+    def close_idle(self):
+        """Close the oldest idle connection to make room. Returns False if there are none."""
+        oldest = None
+        for connections in self.idle.values():
+            for connection in connections:
+                if oldest is None or connection.used < oldest.used:
+                    oldest = connection
+        if oldest is None:
+            return False
+        self.idle[oldest.key].remove(oldest)
+        self.discard(oldest)
+        return True
+
+    def release(self, connection):
+        connections = self.idle.setdefault(connection.key, [])
+        if len(connections) >= MAX_IDLE_PER_HOST:
+            self.discard(connection)
+            return
+        connection.used = time.time()
+        connection.reused = False
+        connections.append(connection)
+        self.freed.set()  # Waiters may take it, or close it to reach another host
+
+    def discard(self, connection):
+        connection.close()
+        self.open -= 1
+        self.freed.set()
+
+    def close(self):
+        for connections in self.idle.values():
+            for connection in connections:
+                self.discard(connection)
+        self.idle = {}
+
+    async def get(self, url, headers=None):
+        """Send a GET and return the Response once its headers are in, following redirects.
+
+        A URL known to redirect permanently is requested where it leads. If that
+        fails, the redirect is forgotten and the URL itself is tried.
+        """
+        cache = self.url_cache
+        target = cache.resolve(url) if cache else url
+        if target != url:
+            try:
+                response = await self.follow(url, target, headers)
+                if response.status_code < 400:
+                    return response
+                response.close()
+            except OSError as e:
+                print(f"Cached redirect of {url} failed: {e}")
+            cache.forget(url)
+        return await self.follow(url, url, headers)
+
+    async def follow(self, origin, url, headers=None):
+        """GET url, following redirects. Permanent ones from origin are remembered."""
+        permanent = True  # Every hop from origin so far was permanent
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self.request(url, headers)
+            if response.status_code not in REDIRECTS:
+                return response
+            location = response.headers.get("location")
+            response.keep_alive = False  # Don't bother reading the body
+            response.close()
+            if not location:
+                return response
+            if location.startswith("/"):
+                ssl, host, port, _ = split_url(url)
+                location = ("https://" if ssl else "http://") + f"{host}:{port}{location}"
+            url = normalize_url(location)
+            permanent = permanent and response.status_code in PERMANENT_REDIRECTS
+            if permanent and self.url_cache:
+                self.url_cache.redirected(origin, url)
+        raise OSError("Too many redirects")
+
+    async def request(self, url, headers=None):
+        ssl, host, port, path = split_url(url)
+        key = (ssl, host, port)
+        request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n"
+        if headers:
+            for name, value in headers.items():
+                request += f"{name}: {value}\r\n"
+        request = (request + "\r\n").encode()
+
+        while True:
+            connection = await self.connect(key)
+            try:
+                connection.writer.write(request)
+                await timed(connection.writer.drain())
+                status = await timed(connection.reader.readline())
+                if not status:
+                    raise OSError("Connection closed")
+                break
+            except (OSError, EOFError):
+                self.discard(connection)
+                if not connection.reused:
+                    raise
+                # The server closed the idle connection; retry on a fresh one
+
+        try:
+            status_code = int(status.split(None, 2)[1])
+            response_headers = {}
+            while True:
+                line = await timed(connection.reader.readline())
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+        except BaseException:
+            self.discard(connection)
+            raise
+        return Response(self, connection, status_code, response_headers)
+
+
+class BufferPool:
+    """A fixed set of read buffers shared by concurrent downloads.
+
+    Bytes read but not yet written to flash can never exceed the pool's total size,
+    however many fetches are running.
+    """
+
+    def __init__(self, count, size):
+        self.free = [bytearray(size) for _ in range(count)]
+        self.available = uasyncio.Event()
+
+    async def acquire(self):
+        while not self.free:
+            self.available.clear()
+            await self.available.wait()
+        return self.free.pop()
+
+    def release(self, buf):
+        self.free.append(buf)
+        self.available.set()
@@ -0,0 +1,135 @@
+import io
+
+try:
+    import deflate  # MicroPython 1.21 and later
+except ImportError:
+    deflate = None
+try:
+    import zlib  # Older MicroPython has zlib.DecompIO, CPython has zlib.decompressobj
+except ImportError:
+    zlib = None
+
+INFLATE_WBITS = 15  # Servers compress with 32KB windows, so each inflater holds one
+# Compressed bytes held back before inflating, more than one output read can use, so the
+# decoder never finds its input empty part way through the body
+INFLATE_LOOKAHEAD = 2 * 1024
+ENCODINGS = ("gzip", "x-gzip", "deflate")
+DECODE_ERRORS = (OSError, ValueError) + ((zlib.error,) if hasattr(zlib, "error") else ())
+
+available = deflate is not None or hasattr(zlib, "DecompIO") or hasattr(zlib, "decompressobj")
+active = 0  # Inflaters not yet closed, each with its window allocated or about to be
+
+
+class _Source(io.IOBase):
+    """The compressed bytes received so far, read by MicroPython's stream decoders."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.pos = 0
+
+    def write(self, data):
+        if self.pos > INFLATE_LOOKAHEAD:
+            self.data = self.data[self.pos :]  # Drop what has been read
+            self.pos = 0
+        self.data += data
+
+    def pending(self):
+        return len(self.data) - self.pos
+
+    def readinto(self, buf):
+        n = min(len(buf), self.pending())
+        buf[:n] = self.data[self.pos : self.pos + n]
+        self.pos += n
+        return n
+
+
+def wbits_for(header):
+    """wbits for zlib.DecompIO and decompressobj: gzip, zlib or raw deflate by the first bytes."""
+    if header[:2] == b"\x1f\x8b":
+        return 16 + INFLATE_WBITS
+    if len(header) > 1 and header[0] & 0x0F == 8 and (header[0] << 8 | header[1]) % 31 == 0:
+        return INFLATE_WBITS
+    return -INFLATE_WBITS  # Some servers send "deflate" without the zlib header
+
+
+class Inflater:
+    """Decompresses a gzip or deflate response body as it arrives.
+
+    write() the body a chunk at a time, end() it, and readinto() the decompressed
+    bytes after each. readinto() returns 0 when it needs more input, and done is
+    set once the whole body is out.
+    """
+
+    def __init__(self):
+        global active
+        active += 1
+        self.source = _Source()
+        self.ended = False
+        self.done = False
+        self.closed = False
+        self._stream = None  # MicroPython decoder
+        self._decompressor = None  # CPython decoder
+
+    def write(self, data):
+        self.source.write(data)
+
+    def end(self):
+        self.ended = True
+
+    def _start(self):
+        data = self.source.data
+        wbits = wbits_for(bytes(data[:2]))
+        if deflate is not None:
+            if wbits > 16:
+                fmt = deflate.GZIP
+            elif wbits > 0:
+                fmt = deflate.ZLIB
+            else:
+                fmt = deflate.RAW
+            self._stream = deflate.DeflateIO(self.source, fmt, INFLATE_WBITS)
+        elif hasattr(zlib, "DecompIO"):
+            self._stream = zlib.DecompIO(self.source, wbits)
+        else:
+            self._decompressor = zlib.decompressobj(wbits)
+
+    def readinto(self, buf):
+        """Decompress into buf. Returns the byte count, 0 if more input is needed or at the end."""
+        if self.done:
+            return 0
+        source = self.source
+        if not self.ended and source.pending() < INFLATE_LOOKAHEAD:
+            return 0
+        if self._stream is None and self._decompressor is None:
+            if not source.pending():
+                self.done = True  # An empty body
+                return 0
+            self._start()
+        try:
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(
+                    bytes(memoryview(source.data)[source.pos :]), len(buf)
+                )
+                source.pos = len(source.data) - len(self._decompressor.unconsumed_tail)
+                n = len(data)
+                buf[:n] = data
+                if self._decompressor.eof:
+                    source.pos = len(source.data)  # Ignore anything after the stream
+            else:
+                n = self._stream.readinto(buf)
+        except DECODE_ERRORS as e:
+            if not self.ended:
+                raise
+            # A body cut short, e.g. by a Range request, ends where the data runs out
+            print(f"Compressed body ended early: {e}")
+            n = 0
+        if not n and (self.ended or self._decompressor is not None and self._decompressor.eof):
+            self.done = True
+        return n
+
+    def close(self):
+        global active
+        if not self.closed:
+            self.closed = True
+            active -= 1
+            self._stream = None
+            self._decompressor = None
@@ -0,0 +1,273 @@
+import json
+import os
+import struct
+import time
+
+STORE_DIR = "store"
+STORE_BUDGET = 64 * 1024  # Flash the cached items may use, across all feeds
+INDEX_FILE = "index.json"
+
+# Feed files hold length-prefixed records, then an offset index and a footer:
+#   record: field count (1 byte), then per field a length (2 bytes) and UTF-8 bytes
+#   index:  one 4-byte offset per record, newest first when records are dated
+#   footer: magic, fetch time and record count
+# Records are (title, description, key, date), date being seconds since 2000 as text.
+# Older ones have fewer fields.
+FOOTER_FORMAT = "<4sIH"
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+MAGIC = b"RSI1"
+# What reading a missing, truncated or garbled file raises
+DAMAGED = (OSError, IndexError, ValueError, getattr(struct, "error", ValueError))
+
+
+def feed_filename(feed):
+    """Turn a feed name like "The Verge" into a safe file name."""
+    return "".join(c if c.isalpha() or c.isdigit() else "_" for c in feed) + ".dat"
+
+
+def path_exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def record_date(fields):
+    """The publish date of a record, 0 if it has none."""
+    return int(fields[3]) if len(fields) > 3 and fields[3] else 0
+
+
+def read_record(f):
+    """Read the record at the file's position as a tuple of fields."""
+    fields = []
+    for _ in range(f.read(1)[0]):
+        length = struct.unpack("<H", f.read(2))[0]
+        fields.append(f.read(length).decode())
+    return tuple(fields)
+
+
+class StoreWriter:
+    """Appends cleaned items for one feed to a temporary file until commit."""
+
+    def __init__(self, store, feed):
+        self.store = store
+        self.feed = feed
+        self.path = store.path(feed) + ".tmp"
+        pending = store.pending.get(feed)
+        if pending and pending[0] == self.path:
+            self.path += "2"  # Don't truncate the file waiting to be swapped in
+        self.offsets = []
+        self.dates = []
+        self.size = 0
+        self._file = open(self.path, "wb")
+
+    def append(self, *fields):
+        self.offsets.append(self.size)
+        self.dates.append(record_date(fields))
+        self._file.write(bytes((len(fields),)))
+        self.size += 1
+        for field in fields:
+            data = field.encode()
+            self._file.write(struct.pack("<H", len(data)))
+            self._file.write(data)
+            self.size += 2 + len(data)
+
+    def commit(self):
+        """Finish the file and make it the feed's cached items. Empty results are dropped.
+
+        The index lists the newest records first, keeping the feed's order for ties,
+        so each feed is a sorted run for the timeline.
+        """
+        if not self.offsets:
+            self.abort()
+            self.store.versions.pop(self.feed, None)  # What was sent doesn't match the cache
+            return
+        dates = self.dates
+        for i in sorted(range(len(self.offsets)), key=lambda i: -dates[i]):
+            self._file.write(struct.pack("<I", self.offsets[i]))
+        self._file.write(struct.pack(FOOTER_FORMAT, MAGIC, int(time.time()), len(self.offsets)))
+        self._file.close()
+        self._file = None
+        self.size += 4 * len(self.offsets) + FOOTER_SIZE
+        self.store.replace(self.feed, self.path, self.size)
+
+    def abort(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        remove_file(self.path)
+
+
+class ItemStore:
+    """Cleaned items per feed on flash, so feeds can be shown before they are refetched.
+
+    Each feed has its own record file. A small JSON index keeps the fetch time, last
+    use and size of each one, and the least recently used feeds are evicted to stay
+    within the flash budget.
+    """
+
+    def __init__(self, directory=STORE_DIR, budget=STORE_BUDGET):
+        self.directory = directory
+        self.budget = budget
+        self.readers = {}  # feed -> open readers; replacing waits until they close
+        self.pending = {}  # feed -> (temporary path, size) waiting for its readers
+        self.versions = {}  # feed -> version of its cached aggregator digest, while it's cached
+        if not path_exists(directory):
+            os.mkdir(directory)
+        try:
+            with open(self.path(INDEX_FILE, raw=True), "r") as f:
+                self.index = json.load(f)  # feed -> [fetched, used, size]
+        except (OSError, ValueError):
+            self.index = {}
+
+    def path(self, feed, raw=False):
+        return self.directory + "/" + (feed if raw else feed_filename(feed))
+
+    def save_index(self):
+        with open(self.path(INDEX_FILE, raw=True), "w") as f:
+            json.dump(self.index, f)
+
+    def has(self, feed):
+        return feed in self.index
+
+    def fetched(self, feed):
+        """When the feed's items were fetched, or None if none are cached."""
+        entry = self.index.get(feed)
+        return entry[0] if entry else None
+
+    def age(self, feed):
+        """Seconds since the feed's items were fetched, or None if none are cached."""
+        entry = self.index.get(feed)
+        if entry is None:
+            return None
+        return time.time() - entry[0]
+
+    def touch(self, feed):
+        """Mark a feed's cached items as just fetched, e.g. when the source says they're unchanged."""
+        if feed in self.index:
+            self.index[feed][0] = int(time.time())
+            self.save_index()
+
+    def writer(self, feed):
+        return StoreWriter(self, feed)
+
+    def replace(self, feed, temp_path, size):
+        if self.readers.get(feed):
+            # Swapped in when the reader closes; the feed counts as fetched already
+            superseded = self.pending.get(feed)
+            if superseded and superseded[0] != temp_path:
+                remove_file(superseded[0])
+            self.pending[feed] = (temp_path, size)
+            if feed in self.index:
+                self.index[feed][0] = int(time.time())
+            self.evict(keep=feed)
+            self.save_index()
+            return
+        if not path_exists(temp_path):
+            print(f"New items for {feed} have gone, keeping the old ones")
+            return
+        path = self.path(feed)
+        remove_file(path)
+        os.rename(temp_path, path)
+        now = int(time.time())
+        self.index[feed] = [now, now, size]
+        self.evict(keep=feed)
+        self.save_index()
+
+    def evict(self, keep=None):
+        """Remove least recently used feeds until the store fits its budget.
+
+        Files waiting to be swapped in are on flash too, so they count.
+        """
+        total = sum(entry[2] for entry in self.index.values())
+        total += sum(entry[1] for entry in self.pending.values())
+        while total > self.budget:
+            oldest = None
+            for feed, entry in self.index.items():
+                if feed != keep and not self.readers.get(feed):
+                    if oldest is None or entry[1] < self.index[oldest][1]:
+                        oldest = feed
+            if oldest is None:
+                break
+            print(f"Evicting cached items for {oldest}")
+            total -= self.index.pop(oldest)[2]
+            self.versions.pop(oldest, None)
+            remove_file(self.path(oldest))
+
+    def drop(self, feed):
+        """Forget a feed whose cached items can't be read."""
+        print(f"Cached items for {feed} are damaged")
+        self.versions.pop(feed, None)
+        if self.index.pop(feed, None) is not None:
+            self.save_index()
+        if not self.readers.get(feed):
+            remove_file(self.path(feed))
+
+    def count(self, feed):
+        if feed not in self.index:
+            return 0
+        try:
+            with open(self.path(feed), "rb") as f:
+                f.seek(-FOOTER_SIZE, 2)
+                return struct.unpack(FOOTER_FORMAT, f.read(FOOTER_SIZE))[2]
+        except DAMAGED:
+            self.drop(feed)
+            return 0
+
+    def record(self, feed, index):
+        """Return one cached item of a feed, or None past the end.
+
+        The file is only open while it's read, so a refetch can replace it in between.
+        """
+        if feed not in self.index:
+            return None
+        try:
+            with open(self.path(feed), "rb") as f:
+                f.seek(-FOOTER_SIZE, 2)
+                magic, fetched, count = struct.unpack(FOOTER_FORMAT, f.read(FOOTER_SIZE))
+                if magic != MAGIC or index >= count:
+                    return None
+                f.seek(-FOOTER_SIZE - 4 * (count - index), 2)
+                f.seek(struct.unpack("<I", f.read(4))[0])
+                return read_record(f)
+        except DAMAGED:
+            self.drop(feed)
+            return None
+
+    def items(self, feed, skip=0):
+        """Yield the cached items of a feed as tuples of fields, one record at a time."""
+        if feed not in self.index:
+            return
+        self.index[feed][1] = int(time.time())
+        self.readers[feed] = self.readers.get(feed, 0) + 1
+        damaged = False
+        try:
+            with open(self.path(feed), "rb") as f:
+                f.seek(-FOOTER_SIZE, 2)
+                magic, fetched, count = struct.unpack(FOOTER_FORMAT, f.read(FOOTER_SIZE))
+                if magic != MAGIC:
+                    damaged = True
+                    return
+                f.seek(-FOOTER_SIZE - 4 * count, 2)
+                offsets = f.read(4 * count)
+                for i in range(skip, count):
+                    f.seek(struct.unpack_from("<I", offsets, 4 * i)[0])
+                    yield read_record(f)
+        except DAMAGED:
+            damaged = True
+        finally:
+            self.readers[feed] -= 1
+            if damaged:
+                self.drop(feed)
+            if not self.readers[feed] and feed in self.pending:
+                self.replace(feed, *self.pending.pop(feed))
+            elif not damaged:
+                self.save_index()  # Keep the last use, so eviction after a restart sees it
@@ -1,108 +1,190 @@
-import rp2
-import network
-import machine
-import uasyncio
-
-
-class NetworkManager:
-    _ifname = ("Client", "Access Point")
-
-    def __init__(self, country="GB", client_timeout=60, access_point_timeout=5, status_handler=None, error_handler=None):
-        rp2.country(country)
-        self._ap_if = network.WLAN(network.AP_IF)
-        self._sta_if = network.WLAN(network.STA_IF)
-
-        self._mode = network.STA_IF
-        self._client_timeout = client_timeout
-        self._access_point_timeout = access_point_timeout
-        self._status_handler = status_handler
-        self._error_handler = error_handler
-        self.UID = ("{:02X}" * 8).format(*machine.unique_id())
-
-    def isconnected(self):
-        return self._sta_if.isconnected() or self._ap_if.isconnected()
-
-    def config(self, var):
-        if self._sta_if.active():
-            return self._sta_if.config(var)
-        else:
-            if var == "password":
-                return self.UID
-            return self._ap_if.config(var)
-
-    def mode(self):
-        if self._sta_if.isconnected():
-            return self._ifname[0]
-        if self._ap_if.isconnected():
-            return self._ifname[1]
-        return None
-
-    def ifaddress(self):
-        if self._sta_if.isconnected():
-            return self._sta_if.ifconfig()[0]
-        if self._ap_if.isconnected():
-            return self._ap_if.ifconfig()[0]
-        return '0.0.0.0'
-
-    def disconnect(self):
-        if self._sta_if.isconnected():
-            self._sta_if.disconnect()
-        if self._ap_if.isconnected():
-            self._ap_if.disconnect()
-
-    async def wait(self, mode):
-        while not self.isconnected():
-            self._handle_status(mode, None)
-            await uasyncio.sleep_ms(1000)
-
-    def _handle_status(self, mode, status):
-        if callable(self._status_handler):
-            self._status_handler(self._ifname[mode], status, self.ifaddress())
-
-    def _handle_error(self, mode, msg):
-        if callable(self._error_handler):
-            if self._error_handler(self._ifname[mode], msg):
-                return
-        raise RuntimeError(msg)
-
-    async def client(self, ssid, psk):
-        if self._sta_if.isconnected():
-            self._handle_status(network.STA_IF, True)
-            return
-
-        self._ap_if.disconnect()
-        self._ap_if.active(False)
-
-        self._sta_if.active(True)
-        self._sta_if.config(pm=0xa11140)
-        self._sta_if.connect(ssid, psk)
-
-        try:
-            await uasyncio.wait_for(self.wait(network.STA_IF), self._client_timeout)
-            self._handle_status(network.STA_IF, True)
-
-        except uasyncio.TimeoutError:
-            self._sta_if.active(False)
-            self._handle_status(network.STA_IF, False)
-            self._handle_error(network.STA_IF, "WIFI Client Failed")
-
-    async def access_point(self):
-        if self._ap_if.isconnected():
-            self._handle_status(network.AP_IF, True)
-            return
-
-        self._sta_if.disconnect()
-        self._sta_if.active(False)
-
-        self._ap_if.ifconfig(("10.10.1.1", "255.255.255.0", "10.10.1.1", "10.10.1.1"))
-        self._ap_if.config(password=self.UID)
-        self._ap_if.active(True)
-
-        try:
-            await uasyncio.wait_for(self.wait(network.AP_IF), self._access_point_timeout)
-            self._handle_status(network.AP_IF, True)
-
-        except uasyncio.TimeoutError:
-            self._sta_if.active(False)
-            self._handle_status(network.AP_IF, False)
-            self._handle_error(network.AP_IF, "WIFI Client Failed")
+import rp2
+import network
+import machine
+import uasyncio
+import json
+from binascii import hexlify, unhexlify
+
+LINK_FILE = "wifi.json"  # The last access point joined, for a faster rejoin
+POLL_MS = 250  # How often the link is checked while connecting
+REJOIN_TIMEOUT = 5  # Seconds to try the remembered access point before a full connect
+MONITOR_INTERVAL = 5  # Seconds between link checks once connected
+MAX_RECONNECT_WAIT = 60  # Longest pause between reconnect attempts
+
+
+class NetworkManager:
+    _ifname = ("Client", "Access Point")
+
+    def __init__(self, country="GB", client_timeout=60, access_point_timeout=5, status_handler=None, error_handler=None, link_file=LINK_FILE):
+        rp2.country(country)
+        self._ap_if = network.WLAN(network.AP_IF)
+        self._sta_if = network.WLAN(network.STA_IF)
+
+        self._mode = network.STA_IF
+        self._client_timeout = client_timeout
+        self._access_point_timeout = access_point_timeout
+        self._status_handler = status_handler
+        self._error_handler = error_handler
+        self.UID = ("{:02X}" * 8).format(*machine.unique_id())
+        self._link_file = link_file
+        self._link = self._load_link()  # {"ssid", "bssid", "channel"} of the last good join
+
+    def isconnected(self):
+        return self._sta_if.isconnected() or self._ap_if.isconnected()
+
+    def config(self, var):
+        if self._sta_if.active():
+            return self._sta_if.config(var)
+        else:
+            if var == "password":
+                return self.UID
+            return self._ap_if.config(var)
+
+    def mode(self):
+        if self._sta_if.isconnected():
+            return self._ifname[0]
+        if self._ap_if.isconnected():
+            return self._ifname[1]
+        return None
+
+    def ifaddress(self):
+        if self._sta_if.isconnected():
+            return self._sta_if.ifconfig()[0]
+        if self._ap_if.isconnected():
+            return self._ap_if.ifconfig()[0]
+        return '0.0.0.0'
+
+    def disconnect(self):
+        if self._sta_if.isconnected():
+            self._sta_if.disconnect()
+        if self._ap_if.isconnected():
+            self._ap_if.disconnect()
+
+    async def wait(self, mode):
+        while not self.isconnected():
+            if mode == network.STA_IF and self._sta_if.status() < 0:
+                # Wrong password, no such network or a failed join: no point waiting
+                raise OSError(self._sta_if.status())
+            self._handle_status(mode, None)
+            await uasyncio.sleep_ms(POLL_MS)
+
+    def _load_link(self):
+        try:
+            with open(self._link_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remember_link(self, ssid):
+        """Save the access point just joined, so the next join can go straight to it.
+
+        Read back from the interface, as a scan here would block the event loop.
+        """
+        try:
+            link = {"ssid": ssid, "channel": self._sta_if.config("channel")}
+        except (OSError, ValueError):
+            return
+        try:
+            bssid = self._sta_if.config("bssid")
+            if bssid:
+                link["bssid"] = hexlify(bssid).decode()
+        except (OSError, ValueError):
+            pass  # Not every port reports it; the channel still narrows the join
+        self._link = link
+        try:
+            with open(self._link_file, "w") as f:
+                json.dump(self._link, f)
+        except OSError:
+            pass
+
+    async def _rejoin(self, ssid, psk):
+        """Join the remembered access point directly. Returns True if connected."""
+        if self._link.get("ssid") != ssid:
+            return False
+        try:
+            if "bssid" in self._link:
+                bssid = unhexlify(self._link["bssid"])
+                self._sta_if.connect(ssid, psk, bssid=bssid, channel=self._link["channel"])
+            else:
+                self._sta_if.connect(ssid, psk, channel=self._link["channel"])
+            await uasyncio.wait_for(self.wait(network.STA_IF), REJOIN_TIMEOUT)
+            return True
+        except (uasyncio.TimeoutError, OSError, KeyError, TypeError, ValueError):
+            self._sta_if.disconnect()
+            return False
+
+    def _handle_status(self, mode, status):
+        if callable(self._status_handler):
+            self._status_handler(self._ifname[mode], status, self.ifaddress())
+
+    def _handle_error(self, mode, msg):
+        if callable(self._error_handler):
+            if self._error_handler(self._ifname[mode], msg):
+                return
+        raise RuntimeError(msg)
+
+    async def client(self, ssid, psk):
+        if self._sta_if.isconnected():
+            self._handle_status(network.STA_IF, True)
+            return
+
+        self._ap_if.disconnect()
+        self._ap_if.active(False)
+
+        self._sta_if.active(True)
+        self._sta_if.config(pm=0xa11140)
+        if await self._rejoin(ssid, psk):
+            self._handle_status(network.STA_IF, True)
+            return
+        self._sta_if.connect(ssid, psk)
+
+        try:
+            await uasyncio.wait_for(self.wait(network.STA_IF), self._client_timeout)
+            self._remember_link(ssid)
+            self._handle_status(network.STA_IF, True)
+
+        except (uasyncio.TimeoutError, OSError):
+            self._sta_if.active(False)
+            self._handle_status(network.STA_IF, False)
+            self._handle_error(network.STA_IF, "WIFI Client Failed")
+
+    async def monitor(self, ssid, psk, interval=MONITOR_INTERVAL):
+        """Keep the client connected, rejoining whenever the link drops.
+
+        Failed attempts are retried after a wait that doubles up to MAX_RECONNECT_WAIT.
+        """
+        retry_wait = 1
+        while True:
+            if self._sta_if.isconnected():
+                retry_wait = 1
+                await uasyncio.sleep(interval)
+                continue
+            self._handle_status(network.STA_IF, False)
+            try:
+                await self.client(ssid, psk)
+            except RuntimeError:
+                pass  # Reported through the error handler; try again later
+            if not self._sta_if.isconnected():
+                await uasyncio.sleep(retry_wait)
+                retry_wait = min(retry_wait * 2, MAX_RECONNECT_WAIT)
+
+    async def access_point(self):
+        if self._ap_if.isconnected():
+            self._handle_status(network.AP_IF, True)
+            return
+
+        self._sta_if.disconnect()
+        self._sta_if.active(False)
+
+        self._ap_if.ifconfig(("10.10.1.1", "255.255.255.0", "10.10.1.1", "10.10.1.1"))
+        self._ap_if.config(password=self.UID)
+        self._ap_if.active(True)
+
+        try:
+            await uasyncio.wait_for(self.wait(network.AP_IF), self._access_point_timeout)
+            self._handle_status(network.AP_IF, True)
+
+        except uasyncio.TimeoutError:
+            self._sta_if.active(False)
+            self._handle_status(network.AP_IF, False)
+            self._handle_error(network.AP_IF, "WIFI Client Failed")
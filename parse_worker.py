@@ -0,0 +1,192 @@
+try:
+    import _thread
+except ImportError:
+    _thread = None  # No second core: feeds are parsed between frames instead
+
+from frame_ticker import sleep_ms, ticks_diff, ticks_us
+from feed_parser import PARSE_BUFFER_SIZE, parse_date, parse_rss_data
+from seen_index import item_key
+from text_cleanup import cleanup_text
+
+RING_SLOTS = 8  # Cleaned items waiting for the render core; the worker waits when it's full
+JOB_SLOTS = 8  # Downloaded feeds waiting for the worker
+WORKER_IDLE_MS = 20  # The worker's sleep while it has nothing to do or the ring is full
+READ_WAIT_MS = 1  # The worker's sleep while the render core reads the download for it
+
+
+class ItemRing:
+    """A fixed ring of slots passing entries from one core to the other.
+
+    Neither side ever waits for the lock for longer than a slot update, and put()
+    fails rather than grows when every slot is taken.
+    """
+
+    def __init__(self, size):
+        self.slots = [None] * size
+        self.head = 0  # Slot of the oldest entry
+        self.count = 0
+        self.lock = _thread.allocate_lock()
+
+    def put(self, entry):
+        """Add an entry. Returns False if the ring is full."""
+        with self.lock:
+            if self.count == len(self.slots):
+                return False
+            self.slots[(self.head + self.count) % len(self.slots)] = entry
+            self.count += 1
+            return True
+
+    def get(self):
+        """Take the oldest entry, or None if the ring is empty."""
+        with self.lock:
+            if not self.count:
+                return None
+            entry = self.slots[self.head]
+            self.slots[self.head] = None
+            self.head = (self.head + 1) % len(self.slots)
+            self.count -= 1
+            return entry
+
+
+class RelayedFile:
+    """A download as the worker sees it: each read is done by the render core.
+
+    littlefs has no locking and the render core writes downloads and the item
+    store while the worker parses, so only the render core touches flash. The
+    worker passes its buffer over and waits for collect() to fill it.
+    """
+
+    def __init__(self, worker, job):
+        self.worker = worker
+        self.job = job
+
+    def readinto(self, view):
+        self.worker.reads.put((self.job, view))
+        while True:
+            n = self.worker.replies.get()
+            if n is not None:
+                break
+            sleep_ms(READ_WAIT_MS)
+        if isinstance(n, Exception):
+            raise n
+        return n
+
+
+class ParseWorker:
+    """Parses and cleans downloaded feeds on the second core.
+
+    The render core submits each Prefetch once its download is on flash, and
+    collect() hands it the cleaned items as they come. Downloads, the item store
+    and every file stay on the render core, which owns the network stack and
+    uasyncio; collect() also reads the download for the worker.
+    """
+
+    def __init__(self, slots=RING_SLOTS):
+        self.jobs = ItemRing(JOB_SLOTS) if _thread else None
+        self.items = ItemRing(slots) if _thread else None
+        self.reads = ItemRing(1) if _thread else None  # (job, buffer) the worker wants filled
+        self.replies = ItemRing(1) if _thread else None  # Bytes read, or the error
+        self.running = False
+        self.buffer = bytearray(PARSE_BUFFER_SIZE)  # The feed being parsed; one at a time
+        self._file = None  # The download being read for the worker, on the render core
+        self._file_job = None
+
+    def start(self):
+        """Start the worker on the second core. Returns False if it can't be started."""
+        if _thread is None:
+            return False
+        try:
+            _thread.start_new_thread(self._run, ())
+        except (OSError, RuntimeError, MemoryError) as e:
+            print(f"Parse worker unavailable, parsing between frames: {e}")
+            return False
+        self.running = True
+        return True
+
+    def submit(self, job):
+        """Queue a downloaded Prefetch. Returns False if the queue is full."""
+        return self.running and self.jobs.put(job)
+
+    def collect(self, limit=RING_SLOTS):
+        """Serve the worker's read and hand up to limit finished items to their jobs.
+
+        Called on the render core.
+        """
+        self._read()
+        for _ in range(limit):
+            entry = self.items.get()
+            if entry is None:
+                return
+            job, record, extra = entry
+            if record is None:
+                if job is self._file_job:
+                    self._close()
+                job._parsed(extra)
+            else:
+                job._take(record, extra)
+
+    def _read(self):
+        """Fill the worker's buffer from its download if it's waiting for more."""
+        request = self.reads.get()
+        if request is None:
+            return
+        job, view = request
+        try:
+            if job.cancelled:
+                n = 0  # Dropped, so let the worker finish
+            else:
+                if job is not self._file_job:
+                    self._close()
+                    self._file = open(job.filename, "rb")
+                    self._file_job = job
+                n = self._file.readinto(view)
+        except OSError as e:
+            n = e
+        self.replies.put(n)
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+        self._file = None
+        self._file_job = None
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                sleep_ms(WORKER_IDLE_MS)
+            else:
+                self._parse(job)
+
+    def _put(self, entry):
+        while not self.items.put(entry):
+            sleep_ms(WORKER_IDLE_MS)
+
+    def _parse(self, job):
+        """Parse and clean one feed, ending with (job, None, (parse us, clean us, items, error))."""
+        parse_us = clean_us = count = 0
+        error = None
+        items = None
+        try:
+            items = parse_rss_data(RelayedFile(self, job), self.buffer)
+            while not job.cancelled:
+                started = ticks_us()
+                item = next(items, None)
+                parse_us += ticks_diff(ticks_us(), started)
+                if item is None:
+                    break
+                title, description, link, date = item
+                key = item_key(title, link)
+                started = ticks_us()
+                title = cleanup_text(title)
+                new = job.seen is None or key not in job.seen
+                description = cleanup_text(description) if new else ""
+                clean_us += ticks_diff(ticks_us(), started)
+                self._put((job, (title, description, str(key), str(parse_date(date))), new))
+                count += 1
+        except Exception as e:
+            error = e
+        finally:
+            if items is not None:
+                items.close()
+        self._put((job, None, (parse_us, clean_us, count, error)))
@@ -0,0 +1,130 @@
+import gc
+import json
+import time
+
+from frame_ticker import ticks_diff, ticks_us
+
+PROFILE_FILE = "profile.json"
+PROFILE_SAVE_INTERVAL = 5 * 60  # Seconds between writes of the profile to flash
+
+# MicroPython has these; CPython has neither
+mem_free = getattr(gc, "mem_free", None)
+mem_alloc = getattr(gc, "mem_alloc", None)
+
+stats = {}  # feed -> counters, stage timings and memory high-water marks
+active_feed = None  # The feed on screen, charged for rendering
+last_saved = 0
+
+
+def feed_stats(feed):
+    entry = stats.get(feed)
+    if entry is None:
+        entry = {
+            "stages": {},  # stage -> [calls, total us, max us]
+            "min_free": None,
+            "max_alloc": 0,
+            "bytes": 0,
+            "items": 0,
+            "frames": 0,
+            "dropped": 0,
+            "scroll_ms": 0,
+            "unchanged": 0,  # Frames not pushed because they matched the last one
+            "errors": 0,
+            "memory_errors": 0,
+        }
+        stats[feed] = entry
+    return entry
+
+
+def start():
+    """Return a timestamp to pass to stop()."""
+    return ticks_us()
+
+
+def stop(feed, stage, started):
+    """Charge the time since started to a stage of a feed and sample the heap."""
+    elapsed = ticks_diff(ticks_us(), started)
+    charge(feed, stage, elapsed)
+    sample(feed)
+    return elapsed
+
+
+def charge(feed, stage, elapsed, calls=1, longest=None):
+    """Add calls taking elapsed us in all to a stage, e.g. as timed on the other core."""
+    entry = feed_stats(feed)
+    if longest is None:
+        longest = elapsed
+    timing = entry["stages"].get(stage)
+    if timing is None:
+        entry["stages"][stage] = [calls, elapsed, longest]
+    else:
+        timing[0] += calls
+        timing[1] += elapsed
+        if longest > timing[2]:
+            timing[2] = longest
+
+
+def sample(feed):
+    """Update the feed's lowest free heap and highest allocated heap."""
+    if mem_free is None:
+        return
+    entry = feed_stats(feed)
+    free = mem_free()
+    if entry["min_free"] is None or free < entry["min_free"]:
+        entry["min_free"] = free
+    allocated = mem_alloc()
+    if allocated > entry["max_alloc"]:
+        entry["max_alloc"] = allocated
+
+
+def add(feed, key, count=1):
+    feed_stats(feed)[key] += count
+
+
+def error(feed, exception):
+    add(feed, "errors")
+    if isinstance(exception, MemoryError):
+        add(feed, "memory_errors")
+
+
+def summary(feed):
+    """One line per feed, e.g. "BBC: fetch 1x812ms | clean 15x2.1ms max 5.0ms | ..."."""
+    entry = stats.get(feed)
+    if entry is None:
+        return f"{feed}: no data"
+    parts = []
+    for stage, (calls, total, longest) in entry["stages"].items():
+        parts.append(
+            f"{stage} {calls}x{total / calls / 1000:.1f}ms max {longest / 1000:.1f}ms"
+        )
+    if entry["min_free"] is not None:
+        parts.append(f"min free {entry['min_free'] // 1024}KB")
+    parts.append(f"{entry['bytes']}B {entry['items']} items")
+    fps = entry["frames"] * 1000 // entry["scroll_ms"] if entry["scroll_ms"] else 0
+    parts.append(
+        f"{entry['frames']} frames {fps}fps {entry['dropped']} dropped {entry['unchanged']} unchanged"
+    )
+    if entry["errors"]:
+        parts.append(f"{entry['errors']} errors ({entry['memory_errors']} memory)")
+    return f"{feed}: " + " | ".join(parts)
+
+
+def report():
+    """Print every feed's summary, closest to running out of memory first."""
+    feeds = sorted(stats, key=lambda f: stats[f]["min_free"] or 0)
+    for feed in feeds:
+        print(summary(feed))
+
+
+def save(filename=PROFILE_FILE, force=False):
+    """Write the profile as JSON, at most once every PROFILE_SAVE_INTERVAL seconds."""
+    global last_saved
+    now = time.time()
+    if not force and now - last_saved < PROFILE_SAVE_INTERVAL:
+        return
+    last_saved = now
+    try:
+        with open(filename, "w") as f:
+            json.dump(stats, f)
+    except OSError as e:
+        print(f"Unable to save profile: {e}")
@@ -1,17 +1,30 @@
 from galactic import GalacticUnicorn
 from picographics import PicoGraphics, DISPLAY_GALACTIC_UNICORN
-import network
 import time
-import urequests as requests
-import re
-import os
 import gc
+import uasyncio
+import profiler
+from text_strip import GlyphAtlas
+from frame_push import FramePusher
+from frame_ticker import FrameTicker, SUBPIXELS, ticks_add, ticks_diff, ticks_ms
+from feed_fetch import DigestFetch, Prefetch
+from item_store import ItemStore, feed_filename
+from http_pool import ConnectionPool, normalize_url
+from network_manager import NetworkManager
+from button_events import ButtonEvents
+from seen_index import SeenIndex, item_key
+from feed_schedule import build_registry, due_feeds
+from parse_worker import ParseWorker
+from url_cache import UrlCache
+from timeline import Timeline
 
 # Initialize the display
 gu = GalacticUnicorn()
 display = PicoGraphics(display=DISPLAY_GALACTIC_UNICORN)
 WIDTH, HEIGHT = display.get_bounds()
 gu.set_brightness(0.5)
+glyph_atlas = GlyphAtlas(display)  # Shared by the source name and the scroller
+frame_pusher = FramePusher(gu, display)  # Skips frames identical to the last one shown
 
 # Default settings
 TEXT_COLOR = display.create_pen(255, 255, 255)  # White
@@ -19,9 +32,10 @@ OUTLINE_COLOR = display.create_pen(50, 50, 50)  # Black
 BACKGROUND_COLOR = display.create_pen(0, 0, 0)  # Dark gray
 FONT = "bitmap8"
 display.set_font(FONT)
-SCROLL_SPEED = 1  # Adjust as needed
+SCROLL_SPEED = 1  # Pixels per frame, fractions like 0.5 allowed
 TIME_BETWEEN_ITEMS = 2  # Seconds
-MAX_RETRIES = 5  # Define the maximum number of retries for WiFi connection
+SOURCE_DISPLAY_TIME = 2  # Seconds the source name is shown before its stories
+WIFI_COUNTRY = "GB"
 
 # Text settings
 source_outline = True
@@ -42,6 +56,10 @@ description_text_color = display.create_pen(239, 245, 191)
 description_outline_color = display.create_pen(32, 32, 32)
 description_bg_color = display.create_pen(0, 0, 0)
 
+breaking_font_name = "bitmap8"
+breaking_text_color = display.create_pen(255, 255, 255)
+breaking_bg_color = display.create_pen(160, 0, 0)
+
 # RSS feeds
 # Some commented out due to memory limits
 rss_feeds = {
@@ -77,239 +95,137 @@ rss_feeds = {
 }
 
 
-def categorize(feed_name):
-    # Categorize each feed into a type
-    categories = {
-        "Tech": [
-            "ArsTechnica",
-            "Engadget",
-            "Gizmodo",
-            "Lifehacker",
-            "Mashable",
-            "TechCrunch",
-            "The Verge",
-            "WIRED",
-        ],
-        "News": ["BBC", "CNN", "HuffPost", "HuffPostUS"],
-        "Science": ["NASA", "SciAmerica"],
-        "Entertainment": ["Billboard", "RollinStone"],
-        "Business": ["FoolWatch", "Forbes", "HBR"],
-        "Other": ["Buzzfeed", "ESPN", "FeedBurner"],
-    }
-
-    for category, feeds in categories.items():
-        if feed_name in feeds:
-            return category
-    return "Other"
-
-
-# Sort the dictionary by type and then alphabetically within each type
-sorted_rss_feeds = dict(
-    sorted(rss_feeds.items(), key=lambda x: (categorize(x[0]), x[0]))
-)
+# Feed categories; feeds in none of them are "Other"
+feed_categories = {
+    "Tech": [
+        "ArsTechnica",
+        "Engadget",
+        "Gizmodo",
+        "Lifehacker",
+        "Mashable",
+        "TechCrunch",
+        "The Verge",
+        "WIRED",
+    ],
+    "News": ["BBC", "CNN", "HuffPost", "HuffPostUS"],
+    "Science": ["NASA", "SciAmerica"],
+    "Entertainment": ["Billboard", "RollinStone"],
+    "Business": ["FoolWatch", "Forbes", "HBR"],
+    "Other": ["Buzzfeed", "ESPN", "FeedBurner"],
+}
 
-print(sorted_rss_feeds)
-print(rss_feeds)
+# Refresh interval (seconds), priority and maximum items for each category's feeds.
+# Feeds with nothing new are refreshed less often, and failing ones back off.
+CATEGORY_SETTINGS = {
+    "News": (10 * 60, 3, 15),
+    "Tech": (30 * 60, 2, 10),
+    "Science": (60 * 60, 1, 10),
+    "Entertainment": (60 * 60, 1, 10),
+    "Business": (60 * 60, 1, 10),
+    "Other": (60 * 60, 1, 10),
+}
+FEED_SETTINGS = {}  # Settings for single feeds, e.g. {"NASA": (2 * 60 * 60, 1, 5)}
+
+# Indexed once: the feeds sorted by category and then alphabetically, as they are shown
+feeds = build_registry(rss_feeds, feed_categories, CATEGORY_SETTINGS, FEED_SETTINGS)
+feed_index = {feed.name: feed for feed in feeds}
+for feed in feeds:
+    feed.url = normalize_url(feed.url)  # Once, so the URL cache knows each feed by one name
+print([feed.name for feed in feeds])
+
+# Timeline mode shows the stories of every cached feed merged newest first, and Vol+/-
+# pick the category shown instead of the feed
+TIMELINE = False
+TIMELINE_ALL = "All"  # Shown first: every category
+timeline_categories = [TIMELINE_ALL]
+for feed in feeds:
+    if feed.category not in timeline_categories:
+        timeline_categories.append(feed.category)
+current_category_index = 0
 
 # Constants for scrolling
 PADDING = 10
 HOLD_TIME = 2  # seconds
 STEP_TIME = 0.025  # seconds
 
-# States for scrolling
-STATE_PRE_SCROLL = 0
-STATE_SCROLLING = 1
-STATE_POST_SCROLL = 2
-
-state = STATE_PRE_SCROLL
-shift = 0
-last_scroll_time = time.ticks_ms()
+# Task timings
+BUTTON_POLL_MS = 5  # How often the button task handles presses
+BRIGHTNESS_STEP = 0.5 * BUTTON_POLL_MS / 1000  # Brightness change per poll while Lux is held
+PREFETCH_STEP_MS = 10  # Pause between prefetch steps so frames stay on time
+
+# Cached items
+FETCH_BATCH = 4  # Feeds downloaded at once; each needs up to MAX_FEED_BYTES of flash until parsed
+# Set to e.g. "http://192.168.1.10:8080" to fetch feeds pre-cleaned by host/aggregator.py
+AGGREGATOR_URL = None
+item_store = ItemStore()
+url_cache = UrlCache()  # Permanent redirects and host addresses, kept across restarts
+http_pool = ConnectionPool(url_cache=url_cache)  # Keeps connections alive for feeds on the same host
+fetching = {}  # feed -> fetch job still downloading or being parsed
+wifi_checked = uasyncio.Event()  # Set once the WiFi connection has been tried
+wifi_up = False  # Kept up to date by the network manager's status callback
+
+# Parse and clean feeds on core 1, so scrolling never waits for it
+PARSE_ON_SECOND_CORE = True
+parse_worker = ParseWorker() if PARSE_ON_SECOND_CORE else None
+if parse_worker and not parse_worker.start():
+    parse_worker = None  # Parsed a step at a time between frames instead
+
+# Seen stories
+REPEATED_STORIES = "shorten"  # Stories shown before: "show" in full, "shorten" to the title, or "skip"
+BREAKING_NEWS_SOURCES = ("BBC", "CNN")  # New stories from these get a banner first
+BREAKING_NEWS_TIME = 3  # Seconds the banner flashes
+BREAKING_NEWS_FLASH_MS = 250
+seen_items = SeenIndex()
 
 # Define a variable to keep track of the current RSS source at the global scope
 current_source_index = 0
+source_switched = False  # Set by the button task, picked up between frames
 
 
-def connect_to_wifi():
-    try:
-        from secrets import WIFI_SSID, WIFI_PASSWORD
-    except ImportError:
-        print("Create secrets.py with your WiFi credentials")
-        return False
-
-    wlan = network.WLAN(network.STA_IF)
-    if wlan.isconnected():
-        print("Already connected to WiFi.")
-        return True
-
-    wlan.active(True)
-    wlan.config(pm=0xA11140)
-    retries = 0
-
-    while retries < MAX_RETRIES:
-        print(f"Attempt {retries + 1} to connect to WiFi...")
-        wlan.connect(WIFI_SSID, WIFI_PASSWORD)
-
-        max_wait = 100
-        while max_wait > 0:
-            if wlan.status() < 0 or wlan.status() >= 3:
-                break
-            max_wait -= 1
-            time.sleep(0.2)
+def network_status(mode, status, ip):
+    """Called by the network manager as the link changes; status is None while joining."""
+    global wifi_up
+    if status is None or status == wifi_up:
+        return
+    wifi_up = status
+    if status:
+        print(f"Connected to WiFi, address {ip}")
+        set_clock()
+    else:
+        print("WiFi is down, showing cached stories until it is back")
 
-        if wlan.isconnected():
-            print("Connected to WiFi successfully.")
-            return True
-        else:
-            print("Failed to connect to WiFi. Retrying...")
-            retries += 1
-            time.sleep(2)  # Wait for 2 seconds before retrying
 
-    print("Failed to connect to WiFi after maximum retries.")
-    return False
+def network_error(mode, message):
+    print(f"WiFi {mode}: {message}")
+    return True  # Not fatal: the monitor keeps trying
 
 
-def fetch_rss_data(url, filename="rss_data.xml"):
-    try:
-        response = requests.get(url)
-        with open(filename, "w") as f:
-            f.write(response.text)
-            print(f"RSS data written to {filename}.")
-        response.close()
-
-        # Check if the file exists and has content
-        file_stat = os.stat(filename)
-        if file_stat[6] == 0:  # Check if the file size is 0
-            print(f"Error: Unable to save RSS data from {url}. Possible space issue.")
-
-        print(f"Successfully fetched and saved RSS data from {url} to {filename}")
-    except Exception as e:
-        print(f"Error fetching RSS data from {url}: {e}")
+network_manager = NetworkManager(
+    WIFI_COUNTRY, status_handler=network_status, error_handler=network_error
+)
 
 
-def parse_rss_data_from_file(filename="rss_data.xml"):
-    items = []
+async def connect_to_wifi():
+    """Join the network, then keep the link up in the background."""
     try:
-        with open(filename, "r") as f:
-            data = f.read()
-
-        # Check if it's an Atom feed
-        if "<feed" in data and "<entry>" in data:
-            split_data = data.split("<entry>")
-            tag_start = "<content"
-            tag_end = "</content>"
-        else:  # Assume it's an RSS feed
-            split_data = data.split("<item>")
-            tag_start = "<description>"
-            tag_end = "</description>"
-
-        for item in split_data[1:]:
-            title = extract_between(item, "<title>", "</title>")
-
-            # Extract content/description
-            description = extract_between(item, tag_start, tag_end)
-            if tag_start == "<content":
-                # Since <content> can have attributes, we need to further clean the content
-                description = re.sub(
-                    r"^.*?>", "", description
-                )  # Remove everything before the closing '>'
-
-            items.append((title, description))
-    except Exception as e:
-        print(f"Error parsing RSS data from file: {e}")
-    return items
-
-
-def extract_between(data, start, end):
-    start_index = data.find(start) + len(start)
-    end_index = data.find(end)
-    return data[start_index:end_index].strip()
-
-
-def cleanup_text(text):
-    # Remove CDATA sections
-    text = remove_cdata(text)
-
-    # Replace HTML entities
-    text = replace_html_entities(text)
-
-    # Remove HTML tags
-    text = remove_html_tags(text)
-
-    # Clean up whitespace
-    text = clean_whitespace(text)
-
-    # Replace curly single quotes with straight single quotes
-    text = text.replace("‘", "'").replace("’", "'")
-
-    return text
-
-
-def remove_cdata(text):
-    cdata_pattern = r"<!\[CDATA\[(.*?)\]\]>"
-    return re.sub(cdata_pattern, r"\1", text)
-
-
-def replace_html_entities(text):
-    replacements = {
-        "&lt;": "<",
-        "&gt;": ">",
-        "&amp;mdash;": "—",
-        "&amp;ndash;": "–",
-        "&hellip;": "...",
-        "&quot;": '"',
-        "&#39;": "'",
-        "&ldquo;": '"',
-        "&rdquo;": '"',
-        "&lsquo;": "'",
-        "&rsquo;": "'",
-        "&euro;": "€",
-        "&pound;": "£",
-        "&yen;": "¥",
-        "&#8216;": "'",
-        "&#8217;": "'",
-        "&#038;": "&",
-        "&#8230;": "...",
-        "&#38;": "&",
-        "&amp;": "&",
-    }
-
-    # Find and remove any encoded "html" type tags like &lt;...&gt;
-    tag_pattern = r"&lt;.*?&gt;"
-    text = re.sub(tag_pattern, "", text)
-
-    # Replace &nbsp; with a space
-    text = text.replace("&amp;nbsp;", " ")
-    text = text.replace("&nbsp;", " ")
-
-    # Replace the rest of the entities
-    for entity, replacement in replacements.items():
-        text = text.replace(entity, replacement)
-
-    return text
-
-
-def remove_html_tags(text):
-    """Remove HTML tags and incomplete tags from a given text."""
-    while "<" in text and ">" in text:
-        start = text.find("<")
-        end = text.find(">")
-        if start < end:
-            text = text[:start] + text[end + 1 :]
-        else:
-            break
+        from secrets import WIFI_SSID, WIFI_PASSWORD
+    except ImportError:
+        print("Create secrets.py with your WiFi credentials")
+        return False
 
-    # Remove incomplete HTML tags
-    text = re.sub(r"<[^>]*$", "", text)
+    await network_manager.client(WIFI_SSID, WIFI_PASSWORD)
+    uasyncio.create_task(network_manager.monitor(WIFI_SSID, WIFI_PASSWORD))
+    return network_manager.isconnected()
 
-    return text
 
+def set_clock():
+    """Set the clock from NTP so cached feed ages are right across reboots."""
+    try:
+        import ntptime
 
-def clean_whitespace(text):
-    """Remove excessive whitespace from a given text."""
-    text = re.sub(
-        r"\s+", " ", text
-    )  # Replace multiple spaces, newlines, and tabs with a single space
-    return text.strip()  # Remove leading and trailing whitespace
+        ntptime.settime()
+    except Exception as e:
+        print(f"Unable to set the clock: {e}")
 
 
 def get_font_height(font_name):
@@ -359,16 +275,13 @@ def outline_text(
 
 def display_text(
     text,
-    centered=False,
-    duration=None,
     outline=False,
     font_name="bitmap8",
     text_color=TEXT_COLOR,
     outline_color=OUTLINE_COLOR,
     bg_color=BACKGROUND_COLOR,
 ):
-    global state, shift, last_scroll_time
-
+    """Draws the text centered on the display."""
     # Set the font
     display.set_font(font_name)
 
@@ -378,40 +291,70 @@ def display_text(
     # Adjusting the y coordinate for vertical centering based on the estimated height
     y = (HEIGHT - text_height) // 2 + 1
 
-    if centered:
-        # Clear the display with the desired background color
-        display.set_pen(bg_color)
-        display.clear()
-
-        w = display.measure_text(text, 1)
-        x = int(WIDTH / 2 - w / 2 + 1)
-        display.set_pen(text_color)
-        if outline:
-            outline_text(text, x, y, 1, font_name, text_color, outline_color, bg_color)
-        else:
-            display.text(text, x, y, -1, 1)
-        gu.update(display)
-        if duration:
-            time.sleep(duration)
+    strip = glyph_atlas.strip(text, font_name, y, outline)
+    if strip:
+        x = int(WIDTH / 2 - strip.width / 2 + 1)
+        strip.draw(display, x, text_color, outline_color, bg_color)
+        frame_pusher.push()
         return
 
-    # Scrolling logic
-    time_ms = time.ticks_ms()
-
-    if state == STATE_PRE_SCROLL:
-        shift = WIDTH  # Start off the screen to the right
-        state = STATE_SCROLLING
-        last_scroll_time = time_ms
-
-    elif state == STATE_SCROLLING:
-        if time_ms - last_scroll_time > STEP_TIME * 1000:
-            shift -= SCROLL_SPEED
-            msg_width = display.measure_text(text, 1)
-            # Adjusting the condition to ensure all words are cleared from the display
-            if shift <= -msg_width - PADDING:
-                state = STATE_POST_SCROLL
-            last_scroll_time = time_ms
-            display.clear()
+    # Clear the display with the desired background color
+    display.set_pen(bg_color)
+    display.clear()
+
+    w = display.measure_text(text, 1)
+    x = int(WIDTH / 2 - w / 2 + 1)
+    display.set_pen(text_color)
+    if outline:
+        outline_text(text, x, y, 1, font_name, text_color, outline_color, bg_color)
+    else:
+        display.text(text, x, y, -1, 1)
+    frame_pusher.push()
+
+
+async def scroll_text(
+    text,
+    outline=False,
+    font_name="bitmap8",
+    text_color=TEXT_COLOR,
+    outline_color=OUTLINE_COLOR,
+    bg_color=BACKGROUND_COLOR,
+):
+    """Scrolls the text across the display, then holds for HOLD_TIME.
+
+    Frames are due every STEP_TIME whatever the text, so the speed doesn't change with
+    its length or outline. Sleeps between frames so the other tasks run meanwhile.
+    """
+    display.set_font(font_name)
+    text_height = get_font_height(font_name)
+    y = (HEIGHT - text_height) // 2 + 1
+
+    # Compose once from cached glyphs so each frame only copies the visible columns
+    feed = profiler.active_feed
+    started = profiler.start()
+    try:
+        strip = glyph_atlas.strip(text, font_name, y, outline)
+    except MemoryError:
+        strip = None  # Too little heap even for new glyphs: draw the string directly
+        gc.collect()
+    profiler.stop(feed, "compose", started)
+    msg_width = strip.width if strip else display.measure_text(text, 1)
+
+    ticker = FrameTicker(int(STEP_TIME * 1000))
+    skipped = frame_pusher.skipped
+    speed = int(SCROLL_SPEED * SUBPIXELS)
+    position = WIDTH * SUBPIXELS  # Start off the screen to the right
+    # Adjusting the condition to ensure all words are cleared from the display
+    while position > (-msg_width - PADDING) * SUBPIXELS:
+        # Move as far as the time passed, so late frames are skipped rather than slowing the text
+        position -= speed * ticker.tick()
+        shift = position // SUBPIXELS
+
+        started = profiler.start()
+        if strip:
+            strip.draw(display, PADDING + shift, text_color, outline_color, bg_color)
+        else:
+            # No framebuffer access: draw the whole string every frame
             display.set_pen(bg_color)
             display.clear()
             if outline:
@@ -428,15 +371,64 @@ def display_text(
             else:
                 display.set_pen(text_color)
                 display.text(text, PADDING + shift, y, -1, 1)
-            gu.update(display)
-            time.sleep(STEP_TIME)
-            check_buttons()  # Check for button presses during scrolling
+        frame_pusher.push()
+        profiler.stop(feed, "frame", started)
+        await wait(ticker.remaining())
+
+    profiler.add(feed, "frames", ticker.frames)
+    profiler.add(feed, "dropped", ticker.late)
+    profiler.add(feed, "scroll_ms", ticker.elapsed())
+    profiler.add(feed, "unchanged", frame_pusher.skipped - skipped)
+    strip = None
+    await wait(HOLD_TIME * 1000)
+
+
+async def show_breaking_news():
+    """Flashes a banner before a new story from one of BREAKING_NEWS_SOURCES."""
+    for flash in range(BREAKING_NEWS_TIME * 1000 // BREAKING_NEWS_FLASH_MS):
+        inverted = flash % 2
+        display_text(
+            "BREAKING",
+            font_name=breaking_font_name,
+            text_color=breaking_bg_color if inverted else breaking_text_color,
+            bg_color=breaking_text_color if inverted else breaking_bg_color,
+        )
+        await wait(BREAKING_NEWS_FLASH_MS)
+
+
+def new_fetch(feed):
+    """A fetch job for a feed, from the aggregator if one is set, otherwise from the feed itself."""
+    if AGGREGATOR_URL:
+        return DigestFetch(feed.name, AGGREGATOR_URL, item_store, seen=seen_items)
+    # Stories that will be shortened or skipped don't need their descriptions cleaned
+    seen = None if REPEATED_STORIES == "show" else seen_items
+    filename = feed_filename(feed.name)[:-4] + ".xml"  # Each download needs its own file
+    return Prefetch(feed.name, feed.url, item_store, filename, seen, feed.max_items, parse_worker)
+
+
+def start_fetch(feed):
+    """Start downloading a feed in its own task; refresh_feeds parses it afterwards."""
+    job = new_fetch(feed)
+    fetching[feed.name] = job
+    # Set before the task first runs, so nothing steps the job before it has downloaded
+    job.downloading = True
+    uasyncio.create_task(job.download(http_pool))
+    return job
+
+
+async def wait(duration_ms):
+    """Sleeps for duration_ms, leaving early if a button press switched the source.
 
-    elif state == STATE_POST_SCROLL:
-        if time_ms - last_scroll_time > HOLD_TIME * 1000:
-            state = STATE_PRE_SCROLL
-            return True  # Return True to indicate that scrolling is done
-    return False  # Return False to indicate that scrolling is still in progress
+    Always yields at least once, so wait(0) lets the button task run.
+    """
+    end = ticks_add(ticks_ms(), duration_ms)
+    while True:
+        remaining = max(0, ticks_diff(end, ticks_ms()))
+        await uasyncio.sleep_ms(min(remaining, BUTTON_POLL_MS))
+        if source_switched:
+            raise SwitchSourceException
+        if remaining <= BUTTON_POLL_MS:
+            return
 
 
 # Define a custom exception for switching sources
@@ -444,133 +436,329 @@ class SwitchSourceException(Exception):
     pass
 
 
-def check_buttons():
-    global current_source_index  # Declare the variable as global inside the function
-
-    if gu.is_pressed(GalacticUnicorn.SWITCH_BRIGHTNESS_UP):
-        print("Brightness up button pressed.")
-        gu.adjust_brightness(+0.01)
+# Vol presses are caught by pin interrupts, so none are lost during blocking work
+button_events = ButtonEvents(
+    (GalacticUnicorn.SWITCH_VOLUME_UP, GalacticUnicorn.SWITCH_VOLUME_DOWN)
+)
 
-    if gu.is_pressed(GalacticUnicorn.SWITCH_BRIGHTNESS_DOWN):
-        print("Brightness down button pressed.")
-        gu.adjust_brightness(-0.01)
+# Volume switch states from the last poll, so a held button switches only once
+volume_up_held = False
+volume_down_held = False
 
-    if gu.is_pressed(GalacticUnicorn.SWITCH_VOLUME_UP):
-        print("Volume up button pressed. Switching to next RSS feed.")
-        current_source_index = (current_source_index + 1) % len(rss_feeds)
-        display.set_pen(BACKGROUND_COLOR)  # Set pen to background color
-        display.clear()  # Clear the display
-        gu.update(display)
-        raise SwitchSourceException
 
-    if gu.is_pressed(GalacticUnicorn.SWITCH_VOLUME_DOWN):
-        print("Volume down button pressed. Switching to previous RSS feed.")
-        current_source_index = (current_source_index - 1 + len(rss_feeds)) % len(
-            rss_feeds
-        )
-        display.set_pen(BACKGROUND_COLOR)  # Set pen to background color
-        display.clear()  # Clear the display
-        gu.update(display)
-        raise SwitchSourceException
+def switch_source(step):
+    global current_source_index, current_category_index, source_switched
+    if TIMELINE:
+        current_category_index = (current_category_index + step) % len(timeline_categories)
+    else:
+        current_source_index = (current_source_index + step) % len(feeds)
+    source_switched = True
 
 
-# Connect to WiFi
-wifi_available = connect_to_wifi()
-if not wifi_available:
-    print("Failed to connect to WiFi. Exiting.")
+def check_buttons():
+    global volume_up_held, volume_down_held
 
+    # Brightness keeps changing while held
+    if gu.is_pressed(GalacticUnicorn.SWITCH_BRIGHTNESS_UP):
+        gu.adjust_brightness(BRIGHTNESS_STEP)
 
-# Main loop
-while True:
-    source, url = list(rss_feeds.items())[current_source_index]
-    switch_source = False  # Flag to determine if we should switch sources
+    if gu.is_pressed(GalacticUnicorn.SWITCH_BRIGHTNESS_DOWN):
+        gu.adjust_brightness(-BRIGHTNESS_STEP)
 
-    try:
-        # Display the RSS source name
-        print(f"Displaying source: {source}")
-        display_text(
-            source,
-            centered=True,
-            duration=2,
-            outline=source_outline,
-            font_name=source_font_name,
-            text_color=source_text_color,
-            outline_color=source_outline_color,
-            bg_color=source_bg_color,
-        )
+    if button_events.enabled:
+        while True:
+            switch = button_events.pop()
+            if switch is None:
+                break
+            if switch == GalacticUnicorn.SWITCH_VOLUME_UP:
+                print("Volume up button pressed. Switching to next RSS feed.")
+                switch_source(+1)
+            else:
+                print("Volume down button pressed. Switching to previous RSS feed.")
+                switch_source(-1)
+        return
 
-        # Clear the RSS data file before fetching new data
-        with open("rss_data.xml", "w") as f:
-            f.write("")  # Clear the file
+    # No interrupts: act on the edge of each poll
+    pressed = gu.is_pressed(GalacticUnicorn.SWITCH_VOLUME_UP)
+    if pressed and not volume_up_held:
+        print("Volume up button pressed. Switching to next RSS feed.")
+        switch_source(+1)
+    volume_up_held = pressed
 
-        # Fetch and parse the RSS data
-        print(f"Fetching RSS data from: {url}")
-        fetch_rss_data(url)
-        gc.collect()
-        items = parse_rss_data_from_file("rss_data.xml")  # Parse from the cleared file
-        print(f"Total stories: {len(items)}")
-        gc.collect()
+    pressed = gu.is_pressed(GalacticUnicorn.SWITCH_VOLUME_DOWN)
+    if pressed and not volume_down_held:
+        print("Volume down button pressed. Switching to previous RSS feed.")
+        switch_source(-1)
+    volume_down_held = pressed
 
-        # Display each title and description
-        for title, description in items:
-            print("Raw title:", title)
-            print("Raw description:", description)
-
-            # Step-by-step cleaning process:
-            print("Cleaning items.")
-            title = cleanup_text(title)
-            description = cleanup_text(description)
-            print("Clean title:", title)
-            print("Clean description:", description)
-            gc.collect()
 
-            print(f"Displaying title: {title}")
-            text_color = display.create_pen(255, 255, 255)
-            outline_color = display.create_pen(64, 64, 127)
-            bg_color = display.create_pen(32, 32, 64)
-
-            while not display_text(
-                title,
-                outline=title_outline,
-                font_name=title_font_name,
-                text_color=title_text_color,
-                outline_color=title_outline_color,
-                bg_color=title_bg_color,
-            ):
-                pass
-
-            print(f"Displaying description: {description}")
-            text_color = display.create_pen(255, 255, 255)
-            outline_color = display.create_pen(64, 64, 127)
-            bg_color = display.create_pen(32, 32, 64)
-
-            while not display_text(
-                description,
-                outline=description_outline,
-                font_name=description_font_name,
-                text_color=description_text_color,
-                outline_color=description_outline_color,
-                bg_color=description_bg_color,
+async def poll_buttons():
+    while True:
+        check_buttons()
+        await uasyncio.sleep_ms(BUTTON_POLL_MS)
+
+
+def job_to_step():
+    """The downloaded feed to parse and clean next, preferring the one on screen."""
+    job = fetching.get(feeds[current_source_index].name)
+    if job and not job.downloading:
+        return job
+    for job in fetching.values():
+        if not job.downloading:
+            return job
+    return None
+
+
+async def refresh_feeds():
+    """Keeps every feed's cached items fresh.
+
+    Due feeds are downloaded concurrently, then parsed and cleaned a step at a time
+    between frames. Each feed's schedule learns from how its fetches went.
+    """
+    await connect_to_wifi()
+    wifi_checked.set()
+
+    while True:
+        now = time.time()
+        for source, job in list(fetching.items()):
+            if job.done:
+                del fetching[source]
+                if job.count:
+                    feed_index[source].fetched(job.new)
+                elif wifi_up:  # Fetches cut short by a dropped link aren't the feed's fault
+                    feed_index[source].failed(now)
+                    print(f"Fetching {source} failed, next try in {feed_index[source].retry_at - now}s")
+                url_cache.save()
+
+        # Digests are small, so every feed can download at once
+        batch = len(feeds) if AGGREGATOR_URL else FETCH_BATCH
+        if wifi_up and len(fetching) < batch:
+            for feed in due_feeds(
+                feeds, item_store, now, current_source_index, batch - len(fetching), fetching
             ):
-                pass
+                start_fetch(feed)
+
+        if parse_worker:
+            # Also picks up after jobs dropped while the worker had them
+            parse_worker.collect()
+        job = job_to_step()
+        if job:
+            job.step()
+            await uasyncio.sleep_ms(PREFETCH_STEP_MS)
+        else:
+            await uasyncio.sleep_ms(100 if fetching else 1000)
+
+
+async def show_story(source, record, feed_seen, label=False):
+    """Scroll a cached story's title and description. Returns False if it was skipped.
+
+    Stories shown before are shortened or skipped as REPEATED_STORIES says. With
+    label, the title starts with the source's name.
+    """
+    title, description = record[0], record[1]
+    # Items cached before the seen index existed have no key
+    key = int(record[2]) if len(record) > 2 else item_key(title, "")
+    if key in seen_items:
+        if REPEATED_STORIES == "skip":
+            return False
+        if REPEATED_STORIES == "shorten":
+            description = ""
+    elif feed_seen and source in BREAKING_NEWS_SOURCES:
+        await show_breaking_news()
+    seen_items.add(key)
+    if label:
+        title = f"{source}: {title}"
+    print(f"Displaying title: {title}")
+    await scroll_text(
+        title,
+        outline=title_outline,
+        font_name=title_font_name,
+        text_color=title_text_color,
+        outline_color=title_outline_color,
+        bg_color=title_bg_color,
+    )
+
+    if description:
+        print(f"Displaying description: {description}")
+        await scroll_text(
+            description,
+            outline=description_outline,
+            font_name=description_font_name,
+            text_color=description_text_color,
+            outline_color=description_outline_color,
+            bg_color=description_bg_color,
+        )
 
+    gc.collect()
+    return True
+
+
+async def show_feeds():
+    global current_source_index, source_switched
+
+    while True:
+        feed = feeds[current_source_index]
+        source, url = feed.name, feed.url
+        chosen = source_switched  # Picked with the buttons rather than reached in turn
+        source_switched = False
+        stories = None
+
+        try:
+            if not chosen and not item_store.has(source) and feed.backing_off(time.time()):
+                # Nothing to show and fetching it keeps failing, so leave it for now
+                print(f"Skipping {source} until it can be fetched")
+                current_source_index = (current_source_index + 1) % len(feeds)
+                await wait(100)  # Don't spin if every feed is failing
+                continue
+
+            # Display the RSS source name
+            print(f"Displaying source: {source}")
+            source_shown = ticks_ms()
+            profiler.active_feed = source
+            display_text(
+                source,
+                outline=source_outline,
+                font_name=source_font_name,
+                text_color=source_text_color,
+                outline_color=source_outline_color,
+                bg_color=source_bg_color,
+            )
+
+            if item_store.has(source):
+                print(f"Showing cached items for: {source}")
+            else:
+                # Nothing cached yet, so fetch it now
+                await wifi_checked.wait()
+                if not wifi_up:
+                    # Nothing to show and no way to fetch it, so say so and move on
+                    display_text(
+                        "No WiFi",
+                        outline=source_outline,
+                        font_name=source_font_name,
+                        text_color=source_text_color,
+                        outline_color=source_outline_color,
+                        bg_color=source_bg_color,
+                    )
+                    await wait(SOURCE_DISPLAY_TIME * 1000)
+                    current_source_index = (current_source_index + 1) % len(feeds)
+                    continue
+                feed.retry_at = 0  # Asked for now, so don't wait out a retry
+                job = fetching.get(source) or start_fetch(feed)
+                print(f"Fetching RSS data from: {url}")
+                while not job.done:
+                    job.step(blocking=True)  # Parses once the download task is done
+                    # Sleep rather than spin while the download task reads; a press
+                    # stops the wait and the refresh task finishes the fetch
+                    await wait(PREFETCH_STEP_MS)
+            stories = item_store.items(source)
             gc.collect()
 
-        # Check for button presses
-        check_buttons()
+            await wait(
+                SOURCE_DISPLAY_TIME * 1000
+                - ticks_diff(ticks_ms(), source_shown)
+            )
+
+            story_count = 0
+            # New stories only count as breaking news once the feed has been shown before
+            feed_key = item_key("feed", source)
+            feed_seen = feed_key in seen_items
+
+            # Display each title and description
+            for record in stories:
+                if await show_story(source, record, feed_seen):
+                    story_count += 1
+
+            print(f"Total stories: {story_count}")
+            seen_items.add(feed_key)
+            seen_items.save()
+            print(profiler.summary(source))
+            profiler.save()
+
+            # If all items for the current source have been displayed, move to the next source
+            print("Normal source switch.")
+            current_source_index = (current_source_index + 1) % len(feeds)
+            if current_source_index == 0:
+                # A full lap: list every feed, the one closest to running out of memory first
+                profiler.report()
+                profiler.save(force=True)
+
+        except SwitchSourceException:
+            # check_buttons has already picked the new source
+            print("Forced source switch.")
+            if stories:
+                stories.close()  # Release the cached items file
+            seen_items.save()
+            display.set_pen(BACKGROUND_COLOR)  # Set pen to background color
+            display.clear()  # Clear the display
+            frame_pusher.push()
+            continue
+
+
+async def show_timeline():
+    """Show the stories of every cached feed in the chosen category, newest first.
+
+    Feeds refetched meanwhile are merged in as they arrive, so a fresh story
+    comes next rather than after every older one.
+    """
+    global source_switched
+
+    while True:
+        category = timeline_categories[current_category_index]
+        source_switched = False
+        names = [feed.name for feed in feeds if category in (TIMELINE_ALL, feed.category)]
+        # New stories only count as breaking news once their feed has been shown before
+        feeds_seen = {name: item_key("feed", name) in seen_items for name in names}
+
+        try:
+            print(f"Displaying timeline: {category}")
+            category_shown = ticks_ms()
+            display_text(
+                category,
+                outline=source_outline,
+                font_name=source_font_name,
+                text_color=source_text_color,
+                outline_color=source_outline_color,
+                bg_color=source_bg_color,
+            )
+            timeline = Timeline(item_store, names, seen_items)
+            gc.collect()
+            await wait(SOURCE_DISPLAY_TIME * 1000 - ticks_diff(ticks_ms(), category_shown))
+
+            story_count = 0
+            while True:
+                entry = timeline.next()
+                if entry is None:
+                    break
+                source, record = entry
+                profiler.active_feed = source
+                if await show_story(source, record, feeds_seen.get(source), label=True):
+                    story_count += 1
+
+            print(f"Total stories: {story_count}")
+            for name in names:
+                if item_store.has(name):
+                    seen_items.add(item_key("feed", name))
+            seen_items.save()
+            profiler.save()
+            if not story_count:
+                await wait(1000)  # Nothing cached yet; give the refresh task a chance
+
+        except SwitchSourceException:
+            print("Forced category switch.")
+            seen_items.save()
+            display.set_pen(BACKGROUND_COLOR)
+            display.clear()
+            frame_pusher.push()
 
-    except SwitchSourceException:
-        switch_source = True
 
-    # If the switch_source flag is set, move to the next source
-    if switch_source:
-        print("Forced source switch.")
-        current_source_index = (current_source_index + 1) % len(rss_feeds)
-        continue  # Skip processing items for the current source
+async def main():
+    # Cached feeds are shown straight away while WiFi connects in the background
+    uasyncio.create_task(poll_buttons())
+    uasyncio.create_task(refresh_feeds())
+    if TIMELINE:
+        await show_timeline()
     else:
-        # If all items for the current source have been displayed, move to the next source
-        print("Normal source switch.")
-        current_source_index = (current_source_index + 1) % len(rss_feeds)
+        await show_feeds()
+
 
-    display.set_pen(BACKGROUND_COLOR)  # Set pen to background color
-    display.clear()  # Clear the display
+uasyncio.run(main())
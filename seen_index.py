@@ -0,0 +1,70 @@
+from array import array
+
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+SEEN_FILE = "seen.bin"
+SEEN_CAPACITY = 512  # Stories remembered; the oldest are forgotten first
+KEY_MASK = 0x3FFFFFFF  # 30 bits keep keys as small ints on MicroPython, so lookups don't allocate
+
+
+def item_key(title, link):
+    """A compact hash of a story's raw title and link or guid."""
+    data = (title + "\n" + link).encode()
+    if crc32 is not None:
+        key = crc32(data)
+    else:
+        key = 0x811C9DC5  # FNV-1a
+        for byte in data:
+            key = ((key ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return (key & KEY_MASK) or 1  # 0 marks an empty slot
+
+
+class SeenIndex:
+    """A fixed-size ring of story keys, persisted to flash.
+
+    Membership is a scan of one small array. It's an explicit loop, as MicroPython
+    can't look an int up in an array with "in". The array never changes size, so
+    the parse worker can check keys on the other core while this one adds them.
+    """
+
+    def __init__(self, filename=SEEN_FILE, capacity=SEEN_CAPACITY):
+        self.filename = filename
+        self.keys = array("I", bytes(4 * capacity))
+        self.head = 0  # Next slot to overwrite
+        self.dirty = False
+        try:
+            with open(filename, "rb") as f:
+                head = f.read(4)
+                data = f.read(4 * capacity)
+            if len(head) == 4 and len(data) == 4 * capacity:
+                self.head = int.from_bytes(head, "little") % capacity
+                self.keys = array("I", data)
+        except OSError:
+            pass
+
+    def __contains__(self, key):
+        for k in self.keys:
+            if k == key:
+                return True
+        return False
+
+    def add(self, key):
+        if key in self:
+            return
+        self.keys[self.head] = key
+        self.head = (self.head + 1) % len(self.keys)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.filename, "wb") as f:
+                f.write(self.head.to_bytes(4, "little"))
+                f.write(self.keys)
+            self.dirty = False
+        except OSError as e:
+            print(f"Unable to save seen stories: {e}")
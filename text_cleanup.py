@@ -0,0 +1,284 @@
+# str.isascii lets CPython skip straight to the next '&' in plain ASCII text.
+# MicroPython does not have it, so there every character is inspected once.
+_isascii = getattr(str, "isascii", None)
+
+CDATA_START = "<![CDATA["
+CDATA_END = "]]>"
+
+# Longest entity name we try to decode, e.g. "&#x2014;" or "&hellip;"
+MAX_ENTITY_LENGTH = 10
+
+# Named entities seen in the feeds. Values are folded to drawable glyphs below.
+NAMED_ENTITIES = {
+    "amp": "&",
+    "lt": "<",
+    "gt": ">",
+    "quot": '"',
+    "apos": "'",
+    "nbsp": " ",
+    "hellip": "…",
+    "mdash": "—",
+    "ndash": "–",
+    "lsquo": "‘",
+    "rsquo": "’",
+    "sbquo": "‚",
+    "ldquo": "“",
+    "rdquo": "”",
+    "bdquo": "„",
+    "laquo": "«",
+    "raquo": "»",
+    "bull": "•",
+    "middot": "·",
+    "euro": "€",
+    "pound": "£",
+    "yen": "¥",
+    "cent": "¢",
+    "copy": "©",
+    "reg": "®",
+    "trade": "™",
+    "deg": "°",
+    "times": "×",
+    "divide": "÷",
+    "aacute": "á",
+    "agrave": "à",
+    "acirc": "â",
+    "auml": "ä",
+    "eacute": "é",
+    "egrave": "è",
+    "ecirc": "ê",
+    "euml": "ë",
+    "iacute": "í",
+    "iuml": "ï",
+    "ntilde": "ñ",
+    "oacute": "ó",
+    "ouml": "ö",
+    "uacute": "ú",
+    "uuml": "ü",
+    "ccedil": "ç",
+    "szlig": "ß",
+}
+
+# Characters bitmap8 has no glyph for, mapped to ones it can draw.
+# Printable ASCII is drawn as-is, and accented Latin-1 letters (U+00C0 to U+00FF)
+# are drawn by PicoGraphics as a base letter plus accent. Anything else is dropped.
+GLYPH_FOLDS = {
+    "\u00a0": " ",  # No-break space
+    "\u2002": " ",  # En space
+    "\u2003": " ",  # Em space
+    "\u2009": " ",  # Thin space
+    "\u202f": " ",  # Narrow no-break space
+    "\u200b": "",  # Zero-width space
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "‛": "'",
+    "′": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "″": '"',
+    "«": '"',
+    "»": '"',
+    "‐": "-",
+    "‑": "-",
+    "‒": "-",
+    "–": "-",
+    "—": "-",
+    "―": "-",
+    "−": "-",
+    "…": "...",
+    "•": "*",
+    "·": "*",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "¢": "c",
+    "©": "(c)",
+    "®": "(R)",
+    "™": "TM",
+    "°": "o",
+    "×": "x",
+    "÷": "/",
+}
+
+
+def cleanup_text(text):
+    # Decode entities, fold glyphs and drop CDATA markers
+    text = replace_html_entities(text)
+
+    # Remove HTML tags and collapse whitespace
+    return strip_markup(text)
+
+
+def find_cdata(text, start):
+    """Return the (start, end) of the next single-line CDATA section, or (-1, -1)."""
+    begin = text.find(CDATA_START, start)
+    while begin != -1:
+        end = text.find(CDATA_END, begin + len(CDATA_START))
+        if end == -1:
+            break
+        if text.find("\n", begin, end) == -1:
+            return begin, end
+        begin = text.find(CDATA_START, begin + 1)
+    return -1, -1
+
+
+def fold_glyph(char):
+    """Return the drawable replacement for a single character."""
+    code = ord(char)
+    if 32 <= code < 127 or char in "\n\r\t":
+        return char
+    folded = GLYPH_FOLDS.get(char)
+    if folded is not None:
+        return folded
+    if 0xC0 <= code <= 0xFF:
+        return char
+    return ""
+
+
+def decode_entity(text, start):
+    """Decode the entity whose name begins at start (just after the '&').
+
+    Returns (replacement, index after the ';'), or None if it is not an entity we know.
+    Double-encoded entities such as "&amp;nbsp;" decode in one step.
+    """
+    end = text.find(";", start, start + MAX_ENTITY_LENGTH + 1)
+    if end == -1:
+        return None
+    name = text[start:end]
+    if not name:
+        return None
+
+    if name[0] == "#":
+        try:
+            if name[1:2] in ("x", "X"):
+                char = chr(int(name[2:], 16))
+            else:
+                char = chr(int(name[1:]))
+        except (ValueError, OverflowError):
+            return None
+    else:
+        char = NAMED_ENTITIES.get(name)
+        if char is None:
+            return None
+
+    if char == "&":
+        # "&amp;mdash;" and friends: decode the entity that follows as well
+        nested = decode_entity(text, end + 1)
+        if nested is not None:
+            return nested
+    return char, end + 1
+
+
+def replace_html_entities(text):
+    """Decode HTML entities, fold non-ASCII characters and drop CDATA markers in one pass."""
+    out = []
+    run_start = 0  # Start of the current run of characters that pass through unchanged
+    i = 0
+    length = len(text)
+    ascii_only = _isascii is not None and _isascii(text)
+
+    # Next CDATA marker to drop: the start of a section, then its end
+    cdata_start, cdata_end = find_cdata(text, 0)
+    marker = cdata_start
+    marker_length = len(CDATA_START)
+
+    while i < length:
+        # Markers skipped over with encoded markup are gone; an end beyond it still goes
+        while marker != -1 and marker < i:
+            if marker == cdata_start:
+                marker, marker_length = cdata_end, len(CDATA_END)
+            else:
+                cdata_start, cdata_end = find_cdata(text, cdata_end + len(CDATA_END))
+                marker, marker_length = cdata_start, len(CDATA_START)
+
+        if ascii_only:
+            amp = text.find("&", i)
+            if marker != -1 and (amp == -1 or marker < amp):
+                i = marker
+            elif amp == -1:
+                break
+            else:
+                i = amp
+
+        if i == marker:
+            out.append(text[run_start:i])
+            i += marker_length
+            run_start = i
+            if marker == cdata_start:
+                marker, marker_length = cdata_end, len(CDATA_END)
+            else:
+                cdata_start, cdata_end = find_cdata(text, i)
+                marker, marker_length = cdata_start, len(CDATA_START)
+            continue
+
+        char = text[i]
+        if char == "&":
+            decoded = decode_entity(text, i + 1)
+            if decoded is None:
+                i += 1
+                continue
+            out.append(text[run_start:i])
+            char, i = decoded
+            if char == "<":
+                # Encoded markup like "&lt;p&gt;" is dropped entirely
+                close = text.find("&gt;", i)
+                if close != -1:
+                    i = close + 4
+                    run_start = i
+                    continue
+            out.append(fold_glyph(char))
+            run_start = i
+        elif ord(char) > 126:
+            out.append(text[run_start:i])
+            out.append(fold_glyph(char))
+            i += 1
+            run_start = i
+        else:
+            i += 1
+
+    if not out:
+        return text
+    out.append(text[run_start:])
+    return "".join(out)
+
+
+def strip_markup(text):
+    """Remove HTML tags, drop a trailing incomplete tag and collapse whitespace in one scan.
+
+    Tags are removed from the first "<" to the next ">" for as long as a "<" comes
+    first. Once a stray ">" is found the rest is kept as text, except for a final "<"
+    that is never closed.
+    """
+    out = []
+    space = False  # Whitespace seen since the last word written
+    position = 0
+    length = len(text)
+
+    while position < length:
+        start = text.find("<", position)
+        end = text.find(">", position)
+        if start == -1 or end == -1 or end < start:
+            # No more complete tags: keep the rest up to a "<" that is never closed
+            start = text.find("<", max(position, text.rfind(">") + 1))
+            segment = text[position:] if start == -1 else text[position:start]
+            position = length
+        else:
+            segment = text[position:start]
+            position = end + 1
+
+        # Collapse whitespace across the kept segments
+        words = segment.split()
+        if not words:
+            space = space or bool(segment)
+            continue
+        if segment[0].isspace():
+            space = True
+        for word in words:
+            if out and space:
+                out.append(" ")
+            out.append(word)
+            space = True
+        space = segment[-1].isspace()
+
+    return "".join(out)
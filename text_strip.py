@@ -0,0 +1,204 @@
+from array import array
+
+import micropython
+
+# Strip column 0 is one pixel left of the text, so the outline has room on both sides
+STRIP_MARGIN = 1
+
+ATLAS_MAX_FONTS = 2  # Fonts kept in the glyph atlas at once
+STRIP_WINDOW = 128  # Columns of a strip composed at once, however long the text
+
+
+def framebuffer(display):
+    """Return the display's framebuffer as a memoryview, or None if it cannot be read."""
+    try:
+        return memoryview(display)
+    except TypeError:
+        return None
+
+
+@micropython.native
+def read_columns(fb, width, height, columns, masks, first):
+    """OR the lit pixels of the first columns of the framebuffer into masks[first + x]."""
+    bpp = len(fb) // (width * height)
+    for x in range(columns):
+        mask = 0
+        offset = x * bpp
+        for row in range(height):
+            for b in range(bpp):
+                if fb[offset + b]:
+                    mask |= 1 << row
+                    break
+            offset += width * bpp
+        masks[first + x] |= mask
+
+
+def outline_masks(masks, height):
+    """Return the 1-pixel outline around masks: the 8-neighbour dilation minus the text."""
+    full = (1 << height) - 1
+    outline = array("H", bytes(2 * len(masks)))
+    last = len(masks) - 1
+    for i in range(len(masks)):
+        m = masks[i]
+        if i > 0:
+            m |= masks[i - 1]
+        if i < last:
+            m |= masks[i + 1]
+        outline[i] = (m | (m << 1) | (m >> 1)) & full & ~masks[i]
+    return outline
+
+
+class GlyphAtlas:
+    """Column masks for each character, rasterized once per font and reused for any text.
+
+    Glyphs are drawn one at a time into the framebuffer and read back, so they match
+    what display.text would draw. Each glyph's outline is worked out by dilation when
+    it is first used. Fonts beyond ATLAS_MAX_FONTS are evicted, least recently used first.
+    """
+
+    def __init__(self, display, max_fonts=ATLAS_MAX_FONTS):
+        self.display = display
+        self.max_fonts = max_fonts
+        self.fonts = {}  # font name -> (y, {char: (masks, outline)})
+        self.recent = []  # Font names, least recently used first
+
+    def glyphs(self, font_name, y):
+        font = self.fonts.get(font_name)
+        if font is not None and font[0] != y:
+            self.evict(font_name)
+            font = None
+        if font is None:
+            while len(self.recent) >= self.max_fonts:
+                self.evict(self.recent[0])
+            font = (y, {})
+            self.fonts[font_name] = font
+        else:
+            self.recent.remove(font_name)
+        self.recent.append(font_name)
+        return font[1]
+
+    def evict(self, font_name):
+        """Forget every glyph of a font."""
+        if font_name in self.fonts:
+            del self.fonts[font_name]
+            self.recent.remove(font_name)
+
+    def rasterize(self, char, font_name, y):
+        display = self.display
+        fb = framebuffer(display)
+        if fb is None:
+            return None
+        width, height = display.get_bounds()
+        display.set_font(font_name)
+        advance = display.measure_text(char, 1)
+        masks = array("H", bytes(2 * (advance + 2 * STRIP_MARGIN)))
+        display.set_pen(display.create_pen(0, 0, 0))
+        display.clear()
+        display.set_pen(display.create_pen(255, 255, 255))
+        display.text(char, STRIP_MARGIN, y, -1, 1)
+        read_columns(fb, width, height, min(width, len(masks)), masks, 0)
+        return masks, outline_masks(masks, height)
+
+    def strip(self, text, font_name, y, outline=False):
+        """Compose text from cached glyphs. Returns None if glyphs cannot be rasterized."""
+        glyphs = self.glyphs(font_name, y)
+        for char in text:
+            if char not in glyphs:
+                glyph = self.rasterize(char, font_name, y)
+                if glyph is None:
+                    return None
+                glyphs[char] = glyph
+
+        width, height = self.display.get_bounds()
+        return TextStrip(text, glyphs, height, outline, max(STRIP_WINDOW, width + 2 * STRIP_MARGIN))
+
+
+class TextStrip:
+    """A line of text as per-column masks, one bit per display row.
+
+    Only a window of columns is composed from the glyphs at a time, moving on as
+    the text scrolls through it, so a long description costs no more memory than
+    a headline. Each scroll frame only copies the visible columns, so its cost
+    does not depend on how long the text is either.
+    """
+
+    def __init__(self, text, glyphs, height, outline, window):
+        self.text = text
+        self.glyphs = glyphs  # char -> (masks, outline), kept even if the atlas evicts the font
+        self.height = height
+        width = 0
+        for char in text:
+            width += len(glyphs[char][0]) - 2 * STRIP_MARGIN
+        self.width = width  # Width of the text itself
+        window = min(window, width + 2 * STRIP_MARGIN)
+        self.masks = array("H", bytes(2 * window))
+        self.outline = array("H", bytes(2 * window)) if outline else None
+        self.start = None  # Strip column of the window's first column
+        self._char = 0  # First character that can reach the window
+        self._char_x = 0  # Strip column of that character's first column
+
+    def compose(self, start):
+        """Compose the window of columns beginning at strip column start."""
+        masks, edges = self.masks, self.outline
+        for i in range(len(masks)):
+            masks[i] = 0
+            if edges:
+                edges[i] = 0
+        text, glyphs = self.text, self.glyphs
+        if start < self._char_x:
+            self._char = self._char_x = 0  # Scrolled back, so find the first character again
+        i, x = self._char, self._char_x
+        while i < len(text):
+            advance = len(glyphs[text[i]][0])
+            if x + advance > start:
+                break
+            x += advance - 2 * STRIP_MARGIN
+            i += 1
+        self._char, self._char_x = i, x
+
+        end = start + len(masks)
+        while i < len(text) and x < end:
+            glyph, glyph_outline = glyphs[text[i]]
+            for j in range(max(0, start - x), min(len(glyph), end - x)):
+                masks[x + j - start] |= glyph[j]
+                if edges:
+                    edges[x + j - start] |= glyph_outline[j]
+            x += len(glyph) - 2 * STRIP_MARGIN
+            i += 1
+
+        if edges:
+            # A neighbour's outline must not cover this glyph's own pixels
+            for j in range(len(masks)):
+                edges[j] &= ~masks[j]
+        self.start = start
+
+    def draw(self, display, x, text_color, outline_color, bg_color):
+        """Draw the strip with the text's left edge at x."""
+        display.set_pen(bg_color)
+        display.clear()
+        width = display.get_bounds()[0]
+        first = max(0, STRIP_MARGIN - x)
+        last = min(self.width + 2 * STRIP_MARGIN, width + STRIP_MARGIN - x)
+        if first >= last:
+            return
+        if self.start is None or first < self.start or last > self.start + len(self.masks):
+            self.compose(first)
+        start = self.start
+        if self.outline:
+            display.set_pen(outline_color)
+            draw_columns(display, self.outline, first - start, last - start, x - STRIP_MARGIN + start)
+        display.set_pen(text_color)
+        draw_columns(display, self.masks, first - start, last - start, x - STRIP_MARGIN + start)
+
+
+@micropython.native
+def draw_columns(display, masks, first, last, x):
+    pixel = display.pixel
+    for i in range(first, last):
+        mask = masks[i]
+        row = 0
+        while mask:
+            if mask & 1:
+                pixel(x + i, row)
+            mask >>= 1
+            row += 1
@@ -0,0 +1,71 @@
+try:
+    import heapq
+except ImportError:
+    import uheapq as heapq  # Older MicroPython
+
+from item_store import record_date
+
+
+class Timeline:
+    """The cached items of several feeds merged into one stream, newest first.
+
+    Each feed's items are stored newest first, so the feeds are sorted runs and a
+    heap holding the next item of each one gives the newest overall. Only one
+    entry per feed is held; items are read from flash as they are reached.
+
+    A feed refetched part way through is merged again from its newest item, but
+    only with the stories in it that aren't in seen, so fresh ones come next
+    without repeating the rest.
+    """
+
+    def __init__(self, store, feeds, seen=None):
+        self.store = store
+        self.feeds = feeds  # Names of the feeds to merge
+        self.seen = seen
+        self.heap = []  # (-date, order, feed, index, new only)
+        self.fetched = {}  # feed -> fetch time of the items being merged
+        self.order = 0  # Breaks ties, so the earlier entry comes first
+        for feed in feeds:
+            self._start(feed, False)
+
+    def _start(self, feed, new_only):
+        self.fetched[feed] = self.store.fetched(feed)
+        self._push(feed, 0, new_only)
+
+    def _push(self, feed, index, new_only):
+        """Queue the feed's item at index, or the first unseen one after it with new_only."""
+        while True:
+            record = self.store.record(feed, index)
+            if record is None:
+                return
+            if not new_only or self.seen is None or len(record) < 3:
+                break
+            if int(record[2]) not in self.seen:
+                break
+            index += 1
+        self.order += 1
+        heapq.heappush(self.heap, (-record_date(record), self.order, feed, index, new_only))
+
+    def _refresh(self):
+        """Merge again the feeds fetched since they were queued, and any newly cached."""
+        for feed in self.feeds:
+            fetched = self.store.fetched(feed)
+            if fetched == self.fetched.get(feed):
+                continue
+            heap = [entry for entry in self.heap if entry[2] != feed]
+            if len(heap) != len(self.heap):
+                heapq.heapify(heap)
+                self.heap = heap
+            self._start(feed, self.fetched.get(feed) is not None)
+
+    def next(self):
+        """Return (feed, record) for the newest item not yet taken, or None when all are."""
+        while True:
+            self._refresh()
+            if not self.heap:
+                return None
+            _, _, feed, index, new_only = heapq.heappop(self.heap)
+            record = self.store.record(feed, index)
+            self._push(feed, index + 1, new_only)
+            if record is not None:
+                return feed, record
@@ -0,0 +1,93 @@
+import json
+import time
+
+try:
+    import socket
+except ImportError:
+    socket = None
+
+URL_CACHE_FILE = "urls.json"
+REDIRECT_TTL = 7 * 24 * 60 * 60  # Seconds a permanent redirect is followed without asking again
+ADDRESS_TTL = 6 * 60 * 60  # Seconds a host's resolved address is used before looking it up again
+
+
+class UrlCache:
+    """Where feed URLs permanently redirect to and what their hosts resolve to, persisted to flash.
+
+    Entries expire after their TTL, so a feed that moves again or a host that
+    changes address is picked up, if a little late.
+    """
+
+    def __init__(self, filename=URL_CACHE_FILE):
+        self.filename = filename
+        self.redirects = {}  # url -> [final url, expiry time]
+        self.addresses = {}  # host -> [address, expiry time]
+        self.dirty = False
+        try:
+            with open(filename, "r") as f:
+                saved = json.load(f)
+            self.redirects = saved.get("redirects", {})
+            self.addresses = saved.get("addresses", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def resolve(self, url):
+        """The URL a request for url should go to."""
+        entry = self.redirects.get(url)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        return url
+
+    def redirected(self, url, location):
+        """Remember that url permanently redirects to location."""
+        entry = self.redirects.get(url)
+        if entry and entry[0] == location:
+            return
+        self.redirects[url] = [location, time.time() + REDIRECT_TTL]
+        self.dirty = True
+
+    def forget(self, url):
+        if self.redirects.pop(url, None):
+            self.dirty = True
+
+    def address(self, host, port):
+        """The address to connect to for host, looked up once ADDRESS_TTL has passed.
+
+        Returns host itself when it can't be resolved here, leaving the error to the
+        connection attempt.
+        """
+        entry = self.addresses.get(host)
+        now = time.time()
+        if entry and entry[1] > now:
+            return entry[0]
+        if socket is None or not host.strip("0123456789."):
+            return host  # Nothing to resolve with, or already an address
+        try:
+            address = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][-1]
+        except (OSError, IndexError) as e:
+            print(f"Unable to resolve {host}: {e}")
+            return host
+        if not isinstance(address, tuple):
+            return host  # Old firmware returns the sockaddr packed
+        self.addresses[host] = [address[0], now + ADDRESS_TTL]
+        self.dirty = True
+        return address[0]
+
+    def forget_address(self, host):
+        if self.addresses.pop(host, None):
+            self.dirty = True
+
+    def save(self):
+        """Write the cache to flash if it changed, dropping expired entries."""
+        if not self.dirty:
+            return
+        now = time.time()
+        for entries in (self.redirects, self.addresses):
+            for key in [key for key, entry in entries.items() if entry[1] <= now]:
+                del entries[key]
+        try:
+            with open(self.filename, "w") as f:
+                json.dump({"redirects": self.redirects, "addresses": self.addresses}, f)
+            self.dirty = False
+        except OSError as e:
+            print(f"Unable to save URL cache: {e}")